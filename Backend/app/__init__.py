@@ -1,18 +1,35 @@
 from flask import Flask
 from flask_cors import CORS
 from app.config import Config
+from app.db import init_app as init_db
+from app.fastjson import init_app as init_json
+from app.metrics import init_app as init_metrics
+from app.querylog import init_app as init_querylog
 from app.auth.routes import auth_bp
 from app.users.routes import users_bp
 from app.groups.routes import groups_bp
 from app.templates.routes import templates_bp
 from app.tasks.routes import tasks_bp
 from app.ollama.routes import ollama_bp
+from app.issues.routes import issues_bp
+from app.export.routes import export_bp
+from app.bulk.routes import bulk_bp
+from app.bulk.cli import import_data
+from app.jobs.routes import jobs_bp
 from flask_cors import CORS
-def create_app():
+def create_app(asgi=False):
+    """
+    Build the Flask app. With asgi=True the app is wrapped for an ASGI
+    server (see app/asgi.py); that needs the optional asgiref/httpx deps.
+    """
     app = Flask(__name__)
     CORS(app)
     app.config.from_object(Config)
     CORS(app, supports_credentials=True, origins="*")
+    init_db(app)
+    init_json(app)
+    init_metrics(app)
+    init_querylog(app)
 
     app.register_blueprint(auth_bp, url_prefix="/api")
     app.register_blueprint(users_bp, url_prefix="/api/users")
@@ -20,5 +37,14 @@ def create_app():
     app.register_blueprint(templates_bp, url_prefix="/api/templates")
     app.register_blueprint(tasks_bp, url_prefix="/api/tasks")
     app.register_blueprint(ollama_bp, url_prefix="/api/ollama")
-    
+    app.register_blueprint(issues_bp, url_prefix="/api/issues")
+    app.register_blueprint(export_bp, url_prefix="/api/export")
+    app.register_blueprint(bulk_bp, url_prefix="/api/import")
+    app.register_blueprint(jobs_bp, url_prefix="/api/jobs")
+    app.cli.add_command(import_data)
+
+    if asgi:
+        from app.asgi import build_asgi_app
+        return build_asgi_app(app)
+
     return app
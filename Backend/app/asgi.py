@@ -0,0 +1,307 @@
+"""
+Optional ASGI serving mode: create_app(asgi=True), served by uvicorn via
+Backend/asgi.py.
+
+POST /api/ollama/ is handled natively on the event loop with an async HTTP
+client, so a slow generation holds a coroutine instead of a worker thread.
+Every other route is delegated to the Flask app through asgiref's
+WsgiToAsgi adapter (a bounded thread pool), where the blocking psycopg2
+calls are already capped by the connection pool in app/db.py.
+"""
+import asyncio
+import json
+import time
+import httpx
+from asgiref.wsgi import WsgiToAsgi
+from app.auth.utils import decode_token
+from app.config import Config
+from app.ollama.routes import (
+    NDJSON_MIMETYPE, wants_ndjson, frame_chunk, stream_headers, build_payload, cached_chunk
+)
+from app.ollama.cache import lookup, StreamCollector
+from app.ollama.client import (
+    AsyncModelLimiter, get_limiter, allowed_models, QueueFull, QueueTimeout
+)
+from app.metrics import observe
+
+OLLAMA_PATHS = ("/api/ollama", "/api/ollama/")
+OLLAMA_ENDPOINT = "ollama.ollama_chat"
+# scope key set when the native route hands a request to Flask, which
+# then records it itself
+DELEGATED = "workflow.delegated"
+
+
+async def read_body(receive):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+def replay_body(body, receive):
+    """`receive` for an app that should see a body we already read."""
+    sent = False
+
+    async def replay():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+    return replay
+
+
+def header(scope, name):
+    name = name.lower().encode("latin-1")
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def cors_headers(scope):
+    # Mirror flask-cors' behaviour for supports_credentials=True, origins="*"
+    origin = header(scope, "origin")
+    if not origin:
+        return [(b"access-control-allow-origin", b"*")]
+    return [
+        (b"access-control-allow-origin", origin.encode("latin-1")),
+        (b"access-control-allow-credentials", b"true"),
+        (b"vary", b"Origin"),
+    ]
+
+
+async def send_body(scope, send, body, status=200, content_type="application/json", headers=None):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", content_type.encode("latin-1")),
+            (b"content-length", str(len(body)).encode("latin-1")),
+        ] + (headers or []) + cors_headers(scope),
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def send_json(scope, send, payload, status=200, headers=None):
+    await send_body(scope, send, json.dumps(payload).encode("utf-8"), status, headers=headers)
+
+
+async def send_busy(scope, send, e):
+    retry = [(b"retry-after", b"5")]
+    if isinstance(e, QueueFull):
+        return await send_json(
+            scope, send, {"error": "Too many pending requests for this model"}, 429, retry
+        )
+    return await send_json(scope, send, {"error": "Timed out waiting for the model"}, 503, retry)
+
+
+async def wait_for_disconnect(receive):
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def relay_chunks(upstream, send, ndjson, collector=None):
+    # `await send` only returns once the server can take more data,
+    # so a slow client throttles how fast we read from Ollama.
+    async for line in upstream.aiter_lines():
+        if line:
+            if collector:
+                collector.feed(line)
+            await send({
+                "type": "http.response.body",
+                "body": frame_chunk(line.encode("utf-8"), ndjson),
+                "more_body": True,
+            })
+    await send({"type": "http.response.body", "body": b""})
+
+
+class AsgiApp:
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+        self.client = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self.lifespan(receive, send)
+
+        if (
+            scope["type"] == "http"
+            and scope["method"] == "POST"
+            and scope["path"] in OLLAMA_PATHS
+        ):
+            return await self.timed(self.ollama_chat, scope, receive, send)
+
+        return await self.wsgi(scope, receive, send)
+
+    async def timed(self, handler, scope, receive, send):
+        """Run a native route and report it like the Flask metrics hooks do."""
+        started = time.perf_counter()
+        status, size = [500], [0]
+
+        async def counting_send(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            elif message["type"] == "http.response.body":
+                size[0] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            return await handler(scope, receive, counting_send)
+        finally:
+            if not scope.get(DELEGATED):
+                observe(OLLAMA_ENDPOINT, scope["method"], status[0],
+                        time.perf_counter() - started, size[0])
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.get_client()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self.client is not None:
+                    await self.client.aclose()
+                    self.client = None
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def get_client(self):
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                base_url=Config.OLLAMA_URL,
+                timeout=httpx.Timeout(
+                    Config.OLLAMA_READ_TIMEOUT, connect=Config.OLLAMA_CONNECT_TIMEOUT
+                ),
+                limits=httpx.Limits(max_keepalive_connections=Config.OLLAMA_POOL_SIZE)
+            )
+        return self.client
+
+    # ===============================
+    # POST /api/ollama/
+    # ===============================
+    async def ollama_chat(self, scope, receive, send):
+        _, error = decode_token(header(scope, "authorization"))
+        if error:
+            return await send_json(scope, send, {"message": error}, 401)
+
+        body = await read_body(receive)
+        try:
+            data = json.loads(body or b"null")
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            return await send_json(scope, send, {"error": "Invalid JSON payload"}, 400)
+
+        model = data.get("model")
+        prompt = data.get("prompt")
+        stream = data.get("stream", False)
+
+        if not model or not prompt:
+            return await send_json(
+                scope, send, {"error": "Model and prompt are required."}, 400
+            )
+        if not isinstance(model, str) or not isinstance(prompt, str):
+            return await send_json(
+                scope, send, {"error": "Model and prompt must be strings."}, 400
+            )
+        if model not in allowed_models():
+            return await send_json(scope, send, {"error": "Unknown model."}, 400)
+
+        if data.get("async") and not stream:
+            # Only a quick job insert: the Flask route does it
+            scope[DELEGATED] = True
+            return await self.wsgi(scope, replay_body(body, receive), send)
+
+        payload = build_payload(data)
+        cache, key = lookup(data)
+        if cache is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                hit = [(b"x-cache", b"HIT")]
+                if not stream:
+                    return await send_json(scope, send, cached, headers=hit)
+                ndjson = wants_ndjson(header(scope, "accept"))
+                return await send_body(
+                    scope, send, cached_chunk(cached, ndjson),
+                    content_type=NDJSON_MIMETYPE if ndjson else "text/event-stream",
+                    headers=hit
+                )
+
+        try:
+            slot = await get_limiter(model, AsyncModelLimiter).acquire()
+        except (QueueFull, QueueTimeout) as e:
+            return await send_busy(scope, send, e)
+
+        try:
+            if stream:
+                store = (lambda result: cache.set(key, result)) if cache is not None else None
+                return await self.ollama_stream(scope, receive, send, payload, store)
+
+            try:
+                ollama_res = await self.get_client().post("/api/generate", json=payload)
+                result = ollama_res.json()
+                if cache is not None and ollama_res.status_code == 200:
+                    cache.set(key, result)
+                return await send_json(scope, send, result)
+
+            except Exception as e:
+                return await send_json(scope, send, {"error": str(e)}, 500)
+        finally:
+            slot.release()
+
+    async def ollama_stream(self, scope, receive, send, payload, store=None):
+        ndjson = wants_ndjson(header(scope, "accept"))
+        started = False
+        try:
+            async with self.get_client().stream(
+                "POST", "/api/generate", json=payload
+            ) as upstream:
+                if upstream.status_code != 200:
+                    body = await upstream.aread()
+                    return await send_body(scope, send, body, upstream.status_code)
+
+                content_type = NDJSON_MIMETYPE if ndjson else "text/event-stream"
+                await send({
+                    "type": "http.response.start",
+                    "status": 200,
+                    "headers": [(b"content-type", content_type.encode("latin-1"))]
+                    + [
+                        (k.lower().encode("latin-1"), v.encode("latin-1"))
+                        for k, v in stream_headers().items()
+                    ]
+                    + cors_headers(scope),
+                })
+                started = True
+
+                # Leaving the `async with` closes the upstream connection, so a
+                # client disconnect cancels the generation on the Ollama side.
+                collector = StreamCollector() if store else None
+                relay = asyncio.ensure_future(
+                    relay_chunks(upstream, send, ndjson, collector)
+                )
+                disconnect = asyncio.ensure_future(wait_for_disconnect(receive))
+                done, pending = await asyncio.wait(
+                    {relay, disconnect}, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in pending:
+                    task.cancel()
+                if relay in done:
+                    relay.result()
+                    if collector and collector.result():
+                        store(collector.result())
+
+        except Exception as e:
+            if not started:
+                return await send_json(scope, send, {"error": str(e)}, 500)
+            # Headers are gone already; just terminate the body.
+            await send({"type": "http.response.body", "body": b""})
+
+
+def build_asgi_app(flask_app):
+    return AsgiApp(flask_app)
@@ -1,13 +1,35 @@
 from flask import Blueprint, request, jsonify
 import jwt
 import datetime
-from app.db import get_cursor, conn
+from app.db import get_cursor, get_conn
 from app.config import Config
 from app.auth.utils import token_required
 from werkzeug.security import generate_password_hash
 auth_bp = Blueprint('auth', __name__)
 
 
+def hash_password(password):
+    return generate_password_hash(password, method='pbkdf2:sha256', salt_length=16)
+
+
+def insert_user(cur, user_id, first_name, last_name, display_name, email, dept, hashed_password):
+    """Insert a web-registered user; returns the id, or None if it is taken."""
+    cur.execute(
+        '''
+        INSERT INTO "User" (
+            id, "firstName", "lastName", "displayName", "email", "dept", "password",
+            "createdAt", "updateSource", "isDeleted"
+        )
+        VALUES (%s, %s, %s, %s, %s, %s, %s, NOW(), %s, FALSE)
+        ON CONFLICT (id) DO NOTHING
+        RETURNING id
+        ''',
+        (user_id, first_name, last_name, display_name, email, dept, hashed_password, "WEB")
+    )
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
 
 @auth_bp.route("/login", methods=["POST"])
 def login():
@@ -72,29 +94,21 @@ def register():
     if not str(user_id).isdigit() or len(str(user_id)) != 8:
         return jsonify({"success": False, "message": "UserID must be an 8-digit number"}), 400
 
-     
-    hashed_password = generate_password_hash(password, method='pbkdf2:sha256', salt_length=16)
-
     cur = get_cursor()
     try:
         cur.execute('SELECT id FROM "User" WHERE id = %s', (user_id,))
         if cur.fetchone():
             return jsonify({"success": False, "message": "UserID already exists"}), 409
 
-        cur.execute(
-            '''
-            INSERT INTO "User" (
-                id, "firstName", "lastName", "displayName", "email", "dept", "password",
-                "createdAt", "updateSource", "isDeleted"
-            )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, NOW(), %s, FALSE)
-            RETURNING id
-            ''',
-            (user_id, first_name, last_name, display_name, email, dept, hashed_password, "WEB")
+        new_user_id = insert_user(
+            cur, user_id, first_name, last_name, display_name, email, dept,
+            hash_password(password)
         )
-        conn.commit()
-        new_user_id = cur.fetchone()[0]
+        if new_user_id is None:
+            get_conn().rollback()
+            return jsonify({"success": False, "message": "UserID already exists"}), 409
+        get_conn().commit()
         return jsonify({"success": True, "userId": new_user_id, "message": "User registered successfully"})
     except Exception as e:
-        conn.rollback()
+        get_conn().rollback()
         return jsonify({"success": False, "message": str(e)}), 500
\ No newline at end of file
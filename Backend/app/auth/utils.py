@@ -1,39 +1,93 @@
 from functools import wraps
+from collections import OrderedDict
 from flask import request, jsonify
+import hashlib
+import threading
+import time
 import jwt
 import inspect
 from app.config import Config
 
+# sha256(token) -> (current_user, exp); LRU-bounded by AUTH_TOKEN_CACHE_SIZE
+_verified_tokens = OrderedDict()
+_verified_lock = threading.Lock()
 
-def token_required(f):
-    @wraps(f)
-    def decorated(*args, **kwargs):
-        token = None
 
-        # Read Authorization header
-        auth_header = request.headers.get("Authorization", None)
-        if auth_header:
-            parts = auth_header.split()
-            if len(parts) == 2 and parts[0].lower() == "bearer":
-                token = parts[1]
+def _cached_user(digest):
+    with _verified_lock:
+        entry = _verified_tokens.get(digest)
+        if entry is None:
+            return None
+        current_user, exp = entry
+        if exp is not None and exp <= time.time():
+            # Let jwt.decode produce the proper "expired" answer
+            del _verified_tokens[digest]
+            return None
+        _verified_tokens.move_to_end(digest)
+        return dict(current_user)
 
-        if not token:
-            return jsonify({"message": "Token is missing!"}), 401
 
-        try:
-            data = jwt.decode(token, Config.SECRET_KEY, algorithms=["HS256"])
-            current_user = {"email": data["email"]}
+def _remember(digest, current_user, exp):
+    with _verified_lock:
+        _verified_tokens[digest] = (current_user, exp)
+        _verified_tokens.move_to_end(digest)
+        while len(_verified_tokens) > Config.AUTH_TOKEN_CACHE_SIZE:
+            _verified_tokens.popitem(last=False)
 
-        except jwt.ExpiredSignatureError:
-            return jsonify({"message": "Token has expired!"}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({"message": "Invalid token!"}), 401
 
-        # ---- Fix: pass current_user ONLY if function expects it ----
-        sig = inspect.signature(f)
-        params = sig.parameters
+def decode_token(auth_header):
+    """
+    Verify a "Bearer <jwt>" Authorization header.
+    Returns (current_user, None) on success or (None, error_message).
+
+    Tokens that verified once are served from an in-memory cache until
+    their `exp`, so repeat calls skip the HMAC check.
+    """
+    token = None
+    if auth_header:
+        parts = auth_header.split()
+        if len(parts) == 2 and parts[0].lower() == "bearer":
+            token = parts[1]
+
+    if not token:
+        return None, "Token is missing!"
+
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    current_user = _cached_user(digest)
+    if current_user is not None:
+        return current_user, None
+
+    try:
+        data = jwt.decode(token, Config.SECRET_KEY, algorithms=["HS256"])
+        current_user = {"email": data["email"]}
+    except jwt.ExpiredSignatureError:
+        return None, "Token has expired!"
+    except jwt.InvalidTokenError:
+        return None, "Invalid token!"
+
+    _remember(digest, current_user, data.get("exp"))
+    return dict(current_user), None
 
-        if "current_user" in params:
+
+def is_admin(current_user):
+    """Whether the signed-in user is listed in QUERY_TRACE_ADMINS."""
+    admins = [e.strip().lower() for e in Config.QUERY_TRACE_ADMINS.split(",") if e.strip()]
+    return bool(current_user) and current_user["email"].lower() in admins
+
+
+def token_required(f):
+    # A route's signature never changes, so check it once at decoration time
+    wants_user = "current_user" in inspect.signature(f).parameters
+
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        # Read Authorization header
+        current_user, error = decode_token(request.headers.get("Authorization", None))
+        if error:
+            return jsonify({"message": error}), 401
+
+        # ---- Fix: pass current_user ONLY if function expects it ----
+        if wants_user:
             return f(current_user, *args, **kwargs)
         else:
             return f(*args, **kwargs)
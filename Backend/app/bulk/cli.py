@@ -0,0 +1,31 @@
+import json
+import click
+from flask.cli import with_appcontext
+from app.db import get_cursor, get_conn
+from app.bulk.loader import (
+    run_import, after_commit, guess_format, KINDS, FORMATS, CONFLICT_MODES
+)
+
+
+@click.command("import-data")
+@click.argument("kind", type=click.Choice(KINDS))
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(FORMATS), help="Defaults to the file extension.")
+@click.option("--on-conflict", type=click.Choice(CONFLICT_MODES), default="skip", show_default=True)
+@with_appcontext
+def import_data(kind, path, fmt, on_conflict):
+    """Bulk import users, groups or templates from a CSV or JSONL file."""
+    with open(path, encoding="utf-8-sig") as f:
+        data = f.read()
+
+    cur = get_cursor()
+    try:
+        # Whoever runs the CLI already has the database credentials
+        summary = run_import(cur, kind, data, fmt or guess_format(path), on_conflict,
+                             allow_hashes=True)
+        get_conn().commit()
+    except Exception:
+        get_conn().rollback()
+        raise
+    after_commit(summary)
+    click.echo(json.dumps(summary, indent=2))
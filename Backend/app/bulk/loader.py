@@ -0,0 +1,368 @@
+"""
+Bulk import of users, groups and templates from CSV or JSON Lines.
+
+Shared by POST /api/import/<kind> and the `flask import-data` command.
+Every record is validated up front; bad records are reported per line
+and the rest are loaded in one transaction:
+
+  users     passwords hashed in a process pool, rows staged with COPY
+            and upserted with ON CONFLICT (id); an update never
+            touches the stored password or revives a deleted user
+  groups    groups created by name (existing ones reused), members
+            staged with COPY and added with ON CONFLICT DO NOTHING
+  templates inserted in batches with their subtasks, then their
+            dependency edges resolved per template
+"""
+import csv
+import io
+import json
+from concurrent.futures import ProcessPoolExecutor
+from psycopg2.extras import execute_values
+from werkzeug.security import generate_password_hash
+from app.config import Config
+from app.cache import invalidate
+from app.subtasks import insert_owned_subtasks, subtask_errors, TEMPLATE_SUBTASKS
+from app.workflow.edges import sync_edges
+
+KINDS = ("users", "groups", "templates")
+FORMATS = ("csv", "jsonl")
+CONFLICT_MODES = ("skip", "update")
+
+USER_FIELDS = ("id", "firstName", "lastName", "displayName", "email", "dept")
+
+
+class BulkImportError(ValueError):
+    """The upload as a whole can't be imported (bad format, unknown kind...)."""
+
+
+# -----------------------------
+# Parsing
+# -----------------------------
+
+
+def guess_format(filename, content_type=None):
+    name = (filename or "").lower()
+    if name.endswith(".csv") or "csv" in (content_type or ""):
+        return "csv"
+    return "jsonl"
+
+
+def parse_records(text, fmt):
+    """
+    Returns (records, errors): records are (line number, dict) pairs.
+    In CSV, list-valued columns (members, subtasks) hold JSON or
+    ";"-separated values.
+    """
+    records, errors = [], []
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(text))
+        for record in reader:
+            records.append((reader.line_num, record))
+    elif fmt == "jsonl":
+        for line_no, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                errors.append({"line": line_no, "error": f"Invalid JSON: {e}"})
+                continue
+            if not isinstance(record, dict):
+                errors.append({"line": line_no, "error": "Expected a JSON object"})
+                continue
+            records.append((line_no, record))
+    else:
+        raise BulkImportError(f"format must be one of {', '.join(FORMATS)}")
+    return records, errors
+
+
+def text(record, key):
+    value = record.get(key)
+    return str(value).strip() if value is not None else ""
+
+
+def list_value(value):
+    if isinstance(value, list):
+        return value
+    value = "" if value is None else str(value).strip()
+    if not value:
+        return []
+    if value.startswith("["):
+        return json.loads(value)
+    return [v.strip() for v in value.split(";") if v.strip()]
+
+
+# -----------------------------
+# Password hashing
+# -----------------------------
+
+
+def hash_password(password):
+    return generate_password_hash(password, method=Config.IMPORT_HASH_METHOD, salt_length=16)
+
+
+def hash_passwords(passwords):
+    """pbkdf2 is CPU bound: spread big batches over IMPORT_HASH_WORKERS processes."""
+    if len(passwords) < Config.IMPORT_HASH_INLINE:
+        return [hash_password(p) for p in passwords]
+    workers = Config.IMPORT_HASH_WORKERS or None
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, len(passwords) // ((workers or 8) * 4))
+        return list(pool.map(hash_password, passwords, chunksize=chunksize))
+
+
+def copy_rows(cur, table, columns, rows):
+    """Stream rows into `table` with COPY ... FROM STDIN (CSV)."""
+    buf = io.StringIO()
+    csv.writer(buf).writerows(rows)
+    buf.seek(0)
+    cols = ", ".join(f'"{c}"' for c in columns)
+    cur.copy_expert(f'COPY {table} ({cols}) FROM STDIN WITH (FORMAT csv)', buf)
+
+
+# -----------------------------
+# Users
+# -----------------------------
+
+
+def import_users(cur, records, errors, on_conflict, allow_hashes=False):
+    """
+    Record: id, firstName, lastName, displayName, email, dept, password.
+    A precomputed passwordHash is only accepted when allow_hashes is set
+    (the CLI, admins over HTTP).
+    """
+    valid, seen = [], {}
+    for line, record in records:
+        values = [text(record, f) for f in USER_FIELDS]
+        password = text(record, "password")
+        password_hash = text(record, "passwordHash")
+        if password_hash and not allow_hashes:
+            errors.append({"line": line, "error": "passwordHash is only accepted from admins"})
+            continue
+        if not all(values) or not (password or password_hash):
+            errors.append({"line": line, "error": "All fields are required"})
+            continue
+        if not values[0].isdigit() or len(values[0]) != 8:
+            errors.append({"line": line, "error": "UserID must be an 8-digit number"})
+            continue
+        if values[0] in seen:
+            errors.append({"line": line, "error": f"Duplicate UserID (first seen on line {seen[values[0]]})"})
+            continue
+        seen[values[0]] = line
+        valid.append((line, values, password, password_hash))
+
+    if not valid:
+        return {"inserted": 0, "updated": 0, "skipped": 0}
+
+    to_hash = [v[2] for v in valid if not v[3]]
+    hashed = iter(hash_passwords(to_hash))
+    rows = [
+        (line, *values, password_hash or next(hashed))
+        for line, values, _, password_hash in valid
+    ]
+
+    cur.execute("""
+        CREATE TEMP TABLE import_users (
+            line int, id int, "firstName" text, "lastName" text, "displayName" text,
+            email text, dept text, password text
+        ) ON COMMIT DROP
+    """)
+    copy_rows(cur, "import_users", ("line",) + USER_FIELDS + ("password",), rows)
+
+    if on_conflict == "update":
+        conflict = """
+            DO UPDATE SET "firstName"=EXCLUDED."firstName", "lastName"=EXCLUDED."lastName",
+                "displayName"=EXCLUDED."displayName", email=EXCLUDED.email,
+                dept=EXCLUDED.dept
+        """
+    else:
+        conflict = "DO NOTHING"
+
+    cur.execute(f"""
+        INSERT INTO "User" (
+            id, "firstName", "lastName", "displayName", email, dept, password,
+            "createdAt", "updateSource", "isDeleted"
+        )
+        SELECT id, "firstName", "lastName", "displayName", email, dept, password,
+               NOW(), 'IMPORT', FALSE
+        FROM import_users
+        ON CONFLICT (id) {conflict}
+        RETURNING id, (xmax = 0)
+    """)
+    written = dict(cur.fetchall())
+
+    skipped = 0
+    for line, values, _, _ in valid:
+        if int(values[0]) not in written:
+            skipped += 1
+            errors.append({"line": line, "error": "UserID already exists"})
+
+    inserted = sum(1 for fresh in written.values() if fresh)
+    return {"inserted": inserted, "updated": len(written) - inserted, "skipped": skipped}
+
+
+# -----------------------------
+# Groups
+# -----------------------------
+
+
+def import_groups(cur, records, errors, on_conflict, allow_hashes=False):
+    """
+    Record: name, createdBy, email, members (user ids). A group whose name
+    already exists is reused; with onConflict=update its email is updated.
+    Members are only ever added.
+    """
+    groups, members = {}, []
+    for line, record in records:
+        name = text(record, "name")
+        if not name:
+            errors.append({"line": line, "error": "name is required"})
+            continue
+        try:
+            user_ids = [int(uid) for uid in list_value(record.get("members"))]
+        except (TypeError, ValueError):
+            errors.append({"line": line, "error": "members must be user ids"})
+            continue
+        groups.setdefault(name, (line, text(record, "createdBy") or "Admin", text(record, "email") or None))
+        members.extend((line, name, uid) for uid in user_ids)
+
+    if not groups:
+        return {"inserted": 0, "updated": 0, "skipped": 0, "members": 0}
+
+    names = list(groups)
+    cur.execute("""
+        SELECT name, id FROM "Group"
+        WHERE name = ANY(%s) AND COALESCE(is_deleted, false) = false
+    """, (names,))
+    existing = dict(cur.fetchall())
+
+    new = [n for n in names if n not in existing]
+    if new:
+        existing.update(execute_values(cur, """
+            INSERT INTO "Group" (name, "createdBy", email, "createdAt", is_deleted)
+            VALUES %s
+            RETURNING name, id
+        """, [(n, groups[n][1], groups[n][2]) for n in new],
+            template="(%s, %s, %s, NOW(), false)", page_size=1000, fetch=True))
+
+    updated = 0
+    if on_conflict == "update":
+        changed = [(existing[n], groups[n][2]) for n in names if n not in new and groups[n][2]]
+        if changed:
+            cur.execute("""
+                UPDATE "Group" g SET email = v.email
+                FROM unnest(%s::int[], %s::text[]) AS v(id, email)
+                WHERE g.id = v.id AND g.email IS DISTINCT FROM v.email
+            """, ([c[0] for c in changed], [c[1] for c in changed]))
+            updated = cur.rowcount
+
+    added = 0
+    if members:
+        cur.execute("""
+            CREATE TEMP TABLE import_members (line int, "groupId" int, "userId" int)
+            ON COMMIT DROP
+        """)
+        copy_rows(cur, "import_members", ("line", "groupId", "userId"),
+                  [(line, existing[name], uid) for line, name, uid in members])
+
+        cur.execute("""
+            SELECT m.line, m."userId" FROM import_members m
+            LEFT JOIN "User" u ON u.id = m."userId" AND COALESCE(u."isDeleted", false) = false
+            WHERE u.id IS NULL
+            ORDER BY m.line
+        """)
+        for line, uid in cur.fetchall():
+            errors.append({"line": line, "error": f"Unknown user {uid}"})
+
+        cur.execute("""
+            INSERT INTO "GroupMember" ("groupId", "userId")
+            SELECT DISTINCT m."groupId", m."userId"
+            FROM import_members m
+            JOIN "User" u ON u.id = m."userId" AND COALESCE(u."isDeleted", false) = false
+            ON CONFLICT ("userId", "groupId") DO NOTHING
+        """)
+        added = cur.rowcount
+
+    return {"inserted": len(new), "updated": updated, "skipped": 0, "members": added}
+
+
+# -----------------------------
+# Templates
+# -----------------------------
+
+
+def import_templates(cur, records, errors, on_conflict, allow_hashes=False):
+    """Record: name, description, createdBy, label, subtasks. Always creates new templates."""
+    valid = []
+    for line, record in records:
+        name, description, label = text(record, "name"), text(record, "description"), text(record, "label")
+        if not name or not description or not label:
+            errors.append({"line": line, "error": "name, description and label are required"})
+            continue
+        try:
+            subtasks = list_value(record.get("subtasks"))
+        except ValueError:
+            errors.append({"line": line, "error": "subtasks must be a JSON list"})
+            continue
+        problems = subtask_errors(subtasks)
+        if problems:
+            errors.append({"line": line, "error": "; ".join(problems)})
+            continue
+        valid.append((name, description, text(record, "createdBy") or "Admin", label, subtasks))
+
+    if not valid:
+        return {"inserted": 0, "updated": 0, "skipped": 0, "ids": []}
+
+    # RETURNING follows the VALUES order, so ids line up with `valid`
+    ids = [r[0] for r in execute_values(cur, """
+        INSERT INTO "Template"
+        (name, description, "createdBy", "createdOn", label, "isDeleted")
+        VALUES %s
+        RETURNING id
+    """, [row[:4] for row in valid], template="(%s, %s, %s, NOW(), %s, false)",
+        page_size=1000, fetch=True)]
+    insert_owned_subtasks(cur, TEMPLATE_SUBTASKS, [
+        (template_id, row[4]) for template_id, row in zip(ids, valid)
+    ])
+    for template_id in ids:
+        sync_edges(cur, TEMPLATE_SUBTASKS, template_id)
+
+    return {"inserted": len(ids), "updated": 0, "skipped": 0, "ids": ids}
+
+
+IMPORTERS = {
+    "users": import_users,
+    "groups": import_groups,
+    "templates": import_templates,
+}
+
+
+def run_import(cur, kind, text_data, fmt, on_conflict="skip", allow_hashes=False):
+    """
+    Parse, validate and load one upload. The caller commits.
+    Returns the summary reported to the client.
+    """
+    if kind not in KINDS:
+        raise BulkImportError(f"kind must be one of {', '.join(KINDS)}")
+    if on_conflict not in CONFLICT_MODES:
+        raise BulkImportError(f"onConflict must be one of {', '.join(CONFLICT_MODES)}")
+
+    records, errors = parse_records(text_data, fmt)
+    received = len(records) + len(errors)
+    counts = IMPORTERS[kind](cur, records, errors, on_conflict, allow_hashes)
+    errors.sort(key=lambda e: e["line"])
+    return {
+        "kind": kind,
+        "received": received,
+        **counts,
+        "errorCount": len(errors),
+        "errors": errors[:Config.IMPORT_MAX_ERRORS],
+    }
+
+
+def after_commit(summary):
+    """Drop cached payloads the committed import made stale."""
+    if summary["kind"] == "templates" and summary["ids"]:
+        from app.templates.routes import LIST_KEY, template_keys
+        keys = [k for tid in summary["ids"] for k in template_keys(tid)]
+        invalidate(LIST_KEY, *keys)
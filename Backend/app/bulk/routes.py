@@ -0,0 +1,52 @@
+from flask import Blueprint, request, jsonify
+from app.db import get_cursor, get_conn
+from app.auth.utils import token_required, is_admin
+from app.bulk.loader import run_import, after_commit, guess_format, BulkImportError
+
+bulk_bp = Blueprint("bulk", __name__)
+
+# -----------------------------
+# 1. Import users / groups / templates
+# -----------------------------
+
+
+@bulk_bp.route("/<any(users, groups, templates):kind>", methods=["POST"])
+@token_required
+def import_records(current_user, kind):
+    """
+    Body: the file as multipart field "file", or the raw CSV / JSONL body.
+    Query Params:
+        format: csv | jsonl (default: from the file name / Content-Type)
+        onConflict: skip (default) | update
+
+    Users may carry a precomputed passwordHash only when the caller is
+    in QUERY_TRACE_ADMINS.
+    """
+    upload = request.files.get("file")
+    if upload is not None:
+        raw = upload.read()
+        fmt = request.args.get("format") or guess_format(upload.filename, upload.mimetype)
+    else:
+        raw = request.get_data()
+        fmt = request.args.get("format") or guess_format(None, request.content_type)
+    if not raw.strip():
+        return jsonify({"success": False, "message": "Nothing to import"}), 400
+
+    try:
+        data = raw.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return jsonify({"success": False, "message": "File must be UTF-8"}), 400
+
+    cur = get_cursor()
+    try:
+        summary = run_import(cur, kind, data, fmt.lower(), request.args.get("onConflict", "skip"),
+                             allow_hashes=is_admin(current_user))
+        get_conn().commit()
+        after_commit(summary)
+        return jsonify({"success": True, **summary})
+    except BulkImportError as e:
+        get_conn().rollback()
+        return jsonify({"success": False, "message": str(e)}), 400
+    except Exception as e:
+        get_conn().rollback()
+        return jsonify({"success": False, "message": str(e)}), 500
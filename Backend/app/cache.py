@@ -0,0 +1,177 @@
+"""
+Read-through cache for rarely changing payloads (the template catalog).
+
+CACHE_BACKEND selects where entries live:
+  "memory" - per-process LRU with TTL (default; each worker keeps its own copy)
+  "redis"  - shared by every worker via CACHE_URL (needs the `redis` package)
+  "none"   - caching disabled
+
+Writers call `invalidate(...)` after committing; CACHE_TTL bounds how long
+another process's memory copy can lag behind. Every invalidation bumps a
+per-key generation, and `cached()` only stores what it loaded if the
+generation is still the one it saw before loading, so a reader that
+raced a write can't put the old rows back for a full TTL.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from app.config import Config
+
+
+class MemoryCache:
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        # key -> number of invalidations
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def generation(self, key):
+        with self._lock:
+            return self._generations.get(key, 0)
+
+    def set(self, key, value, generation=None):
+        with self._lock:
+            if generation is not None and self._generations.get(key, 0) != generation:
+                return
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+                self._generations[key] = self._generations.get(key, 0) + 1
+
+
+# SET only if the key's generation is still ARGV[1]
+_SET_IF_GENERATION = """
+if (redis.call('GET', KEYS[2]) or '0') == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+end
+"""
+
+
+class RedisCache:
+    """Shared backend. Redis being unreachable degrades to a cache miss."""
+
+    def __init__(self, url, ttl, prefix="workflow:"):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=redis needs the 'redis' package installed")
+        self.ttl = ttl
+        self.prefix = prefix
+        self._errors = redis.RedisError
+        self._client = redis.Redis.from_url(url, socket_timeout=1)
+        self._set_if_generation = self._client.register_script(_SET_IF_GENERATION)
+
+    def _generation_key(self, key):
+        return self.prefix + key + ":generation"
+
+    def get(self, key):
+        try:
+            raw = self._client.get(self.prefix + key)
+        except self._errors:
+            return None
+        return None if raw is None else json.loads(raw)
+
+    def generation(self, key):
+        try:
+            return int(self._client.get(self._generation_key(key)) or 0)
+        except self._errors:
+            return None
+
+    def set(self, key, value, generation=None):
+        raw, ex = json.dumps(value), max(int(self.ttl), 1)
+        try:
+            if generation is None:
+                self._client.set(self.prefix + key, raw, ex=ex)
+            else:
+                self._set_if_generation(
+                    keys=[self.prefix + key, self._generation_key(key)],
+                    args=[str(generation), raw, ex],
+                )
+        except self._errors:
+            pass
+
+    def delete(self, *keys):
+        if not keys:
+            return
+        try:
+            pipe = self._client.pipeline()
+            pipe.delete(*(self.prefix + k for k in keys))
+            for k in keys:
+                pipe.incr(self._generation_key(k))
+            pipe.execute()
+        except self._errors:
+            pass
+
+
+class NullCache:
+    def get(self, key):
+        return None
+
+    def generation(self, key):
+        return 0
+
+    def set(self, key, value, generation=None):
+        pass
+
+    def delete(self, *keys):
+        pass
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                backend = Config.CACHE_BACKEND.lower()
+                if backend == "redis":
+                    _cache = RedisCache(Config.CACHE_URL, Config.CACHE_TTL)
+                elif backend == "none":
+                    _cache = NullCache()
+                else:
+                    _cache = MemoryCache(Config.CACHE_SIZE, Config.CACHE_TTL)
+    return _cache
+
+
+def cached(key, load):
+    """
+    Return the cached value for `key`, or call `load()` and cache its
+    result. A `load()` result of None (e.g. "not found") is not cached,
+    and neither is one that an `invalidate(key)` overtook while loading.
+    """
+    cache = get_cache()
+    value = cache.get(key)
+    if value is None:
+        generation = cache.generation(key)
+        value = load()
+        if value is not None and generation is not None:
+            cache.set(key, value, generation)
+    return value
+
+
+def invalidate(*keys):
+    get_cache().delete(*keys)
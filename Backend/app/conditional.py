@@ -0,0 +1,56 @@
+"""
+ETag / If-None-Match support for the read endpoints the SPA refetches on
+every navigation.
+
+The schema has no "updatedAt" columns, so validators come from counters
+kept next to the data: a table's "TableVersion" row (bumped by triggers
+on every write), a task's revision counter, or a hash of a cached
+payload. Reading one is a primary-key lookup, and a matching
+If-None-Match gets an empty 304 before any JSON is built.
+"""
+import hashlib
+import json
+from flask import request, make_response
+
+
+def table_version(cur, table):
+    """
+    (version,) of a table with "TableVersion" triggers ("Task", "Group").
+    Every statement that writes the listed columns bumps it, in the same
+    transaction as the write.
+    """
+    cur.execute('SELECT "version" FROM "TableVersion" WHERE "table" = %s', (table,))
+    row = cur.fetchone()
+    return (row[0] if row else 0,)
+
+
+def make_etag(*parts):
+    """Validator for the current URL (path + query string) and `parts`."""
+    raw = json.dumps([request.full_path, *parts], default=str, separators=(",", ":"))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def payload_etag(payload):
+    raw = json.dumps(payload, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def tagged(payload):
+    """Cache entry holding a payload with its precomputed ETag."""
+    if payload is None:
+        return None
+    return {"etag": payload_etag(payload), "data": payload}
+
+
+def not_modified(etag):
+    """An empty 304 when the client already holds `etag`, otherwise None."""
+    if request.if_none_match.contains_weak(etag):
+        return with_etag(make_response("", 304), etag)
+    return None
+
+
+def with_etag(response, etag):
+    response.set_etag(etag)
+    # Let the browser keep the body but revalidate on every use
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
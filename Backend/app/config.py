@@ -7,3 +7,76 @@ load_dotenv()
 class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "test")
     DATABASE_URL = os.getenv("DATABASE_URL")
+
+    # Connection pool (see app/db.py)
+    DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", 1))
+    DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", 10))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 5))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+    # Ollama upstream (see app/ollama)
+    OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
+    OLLAMA_CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", 5))
+    OLLAMA_READ_TIMEOUT = float(os.getenv("OLLAMA_READ_TIMEOUT", 300))
+    OLLAMA_POOL_SIZE = int(os.getenv("OLLAMA_POOL_SIZE", 10))
+    # Models clients may ask for (comma-separated); each gets its own limiter
+    OLLAMA_MODELS = os.getenv("OLLAMA_MODELS", "gemma3:1b")
+    # Per model: parallel generations, waiting requests, max wait in seconds
+    OLLAMA_MAX_CONCURRENCY = int(os.getenv("OLLAMA_MAX_CONCURRENCY", 2))
+    OLLAMA_MAX_QUEUE = int(os.getenv("OLLAMA_MAX_QUEUE", 16))
+    OLLAMA_QUEUE_TIMEOUT = float(os.getenv("OLLAMA_QUEUE_TIMEOUT", 30))
+    # Prompt/response cache (see app/ollama/cache.py); empty path = memory only
+    OLLAMA_CACHE_ENABLED = os.getenv("OLLAMA_CACHE_ENABLED", "false").lower() == "true"
+    OLLAMA_CACHE_SIZE = int(os.getenv("OLLAMA_CACHE_SIZE", 512))
+    OLLAMA_CACHE_TTL = float(os.getenv("OLLAMA_CACHE_TTL", 3600))
+    OLLAMA_CACHE_PATH = os.getenv("OLLAMA_CACHE_PATH", "")
+
+    # Verified JWTs remembered by token_required (see app/auth/utils.py)
+    AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", 4096))
+
+    # Seconds the /api/issues/assignees list is served from memory
+    ISSUES_ASSIGNEE_TTL = float(os.getenv("ISSUES_ASSIGNEE_TTL", 60))
+
+    # "orjson" (used when installed) or "stdlib" (see app/fastjson.py)
+    JSON_PROVIDER = os.getenv("JSON_PROVIDER", "orjson")
+
+    # Rows per server-side cursor round trip in /api/export
+    EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 2000))
+
+    # Bulk import (see app/bulk): hash method matches /api/register;
+    # 0 workers = one per CPU; smaller batches are hashed in-process
+    IMPORT_HASH_METHOD = os.getenv("IMPORT_HASH_METHOD", "pbkdf2:sha256")
+    IMPORT_HASH_WORKERS = int(os.getenv("IMPORT_HASH_WORKERS", 0))
+    IMPORT_HASH_INLINE = int(os.getenv("IMPORT_HASH_INLINE", 64))
+    IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", 1000))
+
+    # Background jobs (see app/jobs, run with `python worker.py`)
+    JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", 4))
+    JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 1))
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 5))
+    # Retry delay: base * 2^(attempt-1) seconds, capped at max
+    JOB_BACKOFF_BASE = float(os.getenv("JOB_BACKOFF_BASE", 5))
+    JOB_BACKOFF_MAX = float(os.getenv("JOB_BACKOFF_MAX", 600))
+    # A running job untouched this long is assumed lost and requeued
+    JOB_LOCK_TIMEOUT = float(os.getenv("JOB_LOCK_TIMEOUT", 900))
+
+    # Prometheus metrics at GET /metrics (see app/metrics.py); a token
+    # makes the endpoint require "Authorization: Bearer <token>"
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+    # Slow-query log (see app/querylog.py). QUERY_EXPLAIN_RATE is the share
+    # of slow SELECTs re-run under EXPLAIN ANALYZE; admins are emails
+    QUERY_TRACE_ENABLED = os.getenv("QUERY_TRACE_ENABLED", "false").lower() == "true"
+    QUERY_SLOW_MS = float(os.getenv("QUERY_SLOW_MS", 100))
+    QUERY_EXPLAIN_RATE = float(os.getenv("QUERY_EXPLAIN_RATE", 0))
+    QUERY_TRACE_SIZE = int(os.getenv("QUERY_TRACE_SIZE", 200))
+    QUERY_TRACE_SQL_MAX = int(os.getenv("QUERY_TRACE_SQL_MAX", 2000))
+    QUERY_TRACE_ADMINS = os.getenv("QUERY_TRACE_ADMINS", "")
+
+    # Read-through cache for the template catalog (see app/cache.py):
+    # "memory", "redis" or "none"
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+    CACHE_URL = os.getenv("CACHE_URL", "redis://localhost:6379/0")
+    CACHE_TTL = float(os.getenv("CACHE_TTL", 300))
+    CACHE_SIZE = int(os.getenv("CACHE_SIZE", 1024))
@@ -1,16 +1,222 @@
+import queue
+import threading
+import time
 import psycopg2
+from psycopg2 import extensions
+from psycopg2.extras import execute_values
 from urllib.parse import urlparse
+from flask import g, jsonify
 from app.config import Config
 
-result = urlparse(Config.DATABASE_URL)
-conn = psycopg2.connect(
-    host=result.hostname,
-    database=result.path[1:],
-    user=result.username,
-    password=result.password,
-    port=result.port
-)
+
+class PoolTimeout(Exception):
+    """No connection became free within DB_POOL_TIMEOUT seconds."""
+
+
+class ConnectionPool:
+    """
+    Thread-safe psycopg2 connection pool.
+
+    At most `maxconn` connections are checked out at once; callers block
+    up to `timeout` seconds for a free slot. Idle connections are reused
+    most-recently-returned first and, with `pre_ping`, verified before
+    being handed out so a server restart does not surface as a 500.
+    """
+
+    def __init__(self, minconn, maxconn, timeout, pre_ping=True, **connect_kwargs):
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.pre_ping = pre_ping
+        self._connect_kwargs = connect_kwargs
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self._open = 0
+
+        for _ in range(minconn):
+            self._idle.put(self._connect())
+
+    def _connect(self):
+        conn = psycopg2.connect(**self._connect_kwargs)
+        with self._lock:
+            self._open += 1
+        return conn
+
+    def _discard(self, conn):
+        with self._lock:
+            self._open -= 1
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def _healthy(self, conn):
+        if conn.closed:
+            return False
+        if not self.pre_ping:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolTimeout(
+                f"No database connection available within {self.timeout}s"
+            )
+        try:
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._connect()
+                if self._healthy(conn):
+                    return conn
+                self._discard(conn)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn):
+        try:
+            if conn.closed:
+                self._discard(conn)
+                return
+            status = conn.info.transaction_status
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                self._discard(conn)
+                return
+            if status != extensions.TRANSACTION_STATUS_IDLE:
+                # Never hand an open (or aborted) transaction to the next request
+                conn.rollback()
+            self._idle.put(conn)
+        except psycopg2.Error:
+            self._discard(conn)
+        finally:
+            self._slots.release()
+
+    def stats(self):
+        idle = self._idle.qsize()
+        return {
+            "max": self.maxconn,
+            "open": self._open,
+            "idle": idle,
+            "inUse": self._open - idle,
+        }
+
+    def closeall(self):
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Create the pool on first use so importing the app never needs a live DB."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                result = urlparse(Config.DATABASE_URL)
+                _pool = ConnectionPool(
+                    Config.DB_POOL_MIN,
+                    Config.DB_POOL_MAX,
+                    Config.DB_POOL_TIMEOUT,
+                    pre_ping=Config.DB_POOL_PRE_PING,
+                    host=result.hostname,
+                    database=result.path[1:],
+                    user=result.username,
+                    password=result.password,
+                    port=result.port
+                )
+    return _pool
+
+
+def get_conn():
+    """Connection bound to the current app context, checked out on first use."""
+    if "db_conn" not in g:
+        g.db_conn = get_pool().getconn()
+    return g.db_conn
+
+
+_query_observers = []
+
+
+def observe_queries(fn):
+    """
+    Register fn(cursor, sql, params, seconds), called after every statement
+    run through a get_cursor() cursor (see app/metrics.py). Registering
+    the same fn again (another create_app() in the process) is a no-op.
+    """
+    if fn not in _query_observers:
+        _query_observers.append(fn)
+    return fn
+
+
+class ObservedCursor(extensions.cursor):
+    """Cursor that reports each statement's duration to the query observers."""
+
+    def _observe(self, sql, params, started):
+        elapsed = time.perf_counter() - started
+        for fn in _query_observers:
+            fn(self, sql, params, elapsed)
+
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            self._observe(query, vars, started)
+
+    def executemany(self, query, vars_list):
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            self._observe(query, None, started)
+
+    def copy_expert(self, sql, file, size=8192):
+        started = time.perf_counter()
+        try:
+            return super().copy_expert(sql, file, size)
+        finally:
+            self._observe(sql, None, started)
 
 
 def get_cursor():
-    return conn.cursor()
+    if _query_observers:
+        return get_conn().cursor(cursor_factory=ObservedCursor)
+    return get_conn().cursor()
+
+
+def insert_many(cur, sql, rows, page_size=1000):
+    """
+    Multi-row INSERT through execute_values: `sql` has a single `VALUES %s`
+    and every `page_size` rows go to the server in one statement.
+    """
+    if rows:
+        execute_values(cur, sql, rows, page_size=page_size)
+
+
+def release_conn(exc=None):
+    conn = g.pop("db_conn", None)
+    if conn is not None:
+        get_pool().putconn(conn)
+
+
+def init_app(app):
+    app.teardown_appcontext(release_conn)
+
+    @app.errorhandler(PoolTimeout)
+    def pool_timeout(e):
+        return jsonify({"error": "Database busy, please retry"}), 503
@@ -0,0 +1,226 @@
+import csv
+import io
+from flask import Blueprint, request, jsonify, Response
+from app.db import get_pool
+from app.auth.utils import token_required
+from app.config import Config
+from app.fastjson import json_object_sql
+
+export_bp = Blueprint("export", __name__)
+
+JSONL_MIMETYPE = "application/x-ndjson"
+
+# -----------------------------
+# Export queries
+# -----------------------------
+# jsonl: one JSON document per row, rendered by Postgres (nested subtasks included)
+# csv:   (header, query) with one flat row per subtask
+
+
+def subtasks_json(table, owner):
+    fields = json_object_sql([
+        ("id", "s.id"),
+        ("action", "s.action"),
+        ("description", "s.description"),
+        ("assignee", "s.assignee"),
+        ("dependsOn", 's."dependsOn"'),
+    ], as_text=False)
+    return f"""COALESCE((
+        SELECT json_agg({fields} ORDER BY s."position", s.id)
+        FROM "{table}" s WHERE s."{owner}" = o.id
+    ), '[]'::json)"""
+
+
+EXPORTS = {
+    "tasks": {
+        "jsonl": f"""
+            SELECT {json_object_sql([
+                ("id", "o.id"),
+                ("name", "o.name"),
+                ("description", "o.description"),
+                ("templateId", 'o."templateId"'),
+                ("templateName", 'o."templateName"'),
+                ("templateDescription", 'o."templateDescription"'),
+                ("createdBy", 'o."createdBy"'),
+                ("createdOn", 'o."createdOn"'),
+                ("subtasks", subtasks_json("TaskSubTask", "taskId")),
+            ])}
+            FROM "Task" o
+            WHERE o."isDeleted" = false
+            ORDER BY o.id
+        """,
+        "csv": (
+            ["taskId", "taskName", "taskDescription", "templateId", "templateName",
+             "createdBy", "createdOn", "subtaskId", "action", "description",
+             "assignee", "dependsOn"],
+            """
+            SELECT o.id, o.name, o.description, o."templateId", o."templateName",
+                   o."createdBy", o."createdOn", s.id, s.action, s.description,
+                   s.assignee, s."dependsOn"
+            FROM "Task" o
+            LEFT JOIN "TaskSubTask" s ON s."taskId" = o.id
+            WHERE o."isDeleted" = false
+            ORDER BY o.id, s."position", s.id
+            """
+        ),
+    },
+    "templates": {
+        "jsonl": f"""
+            SELECT {json_object_sql([
+                ("id", "o.id"),
+                ("name", "o.name"),
+                ("description", "o.description"),
+                ("label", "o.label"),
+                ("createdBy", 'o."createdBy"'),
+                ("createdOn", 'o."createdOn"'),
+                ("subtasks", subtasks_json("SubTask", "templateId")),
+            ])}
+            FROM "Template" o
+            WHERE o."isDeleted" = false
+            ORDER BY o.id
+        """,
+        "csv": (
+            ["templateId", "templateName", "templateDescription", "label",
+             "createdBy", "createdOn", "subtaskId", "action", "description",
+             "assignee", "dependsOn"],
+            """
+            SELECT o.id, o.name, o.description, o.label,
+                   o."createdBy", o."createdOn", s.id, s.action, s.description,
+                   s.assignee, s."dependsOn"
+            FROM "Template" o
+            LEFT JOIN "SubTask" s ON s."templateId" = o.id
+            WHERE o."isDeleted" = false
+            ORDER BY o.id, s."position", s.id
+            """
+        ),
+    },
+    "users": {
+        "jsonl": f"""
+            SELECT {json_object_sql([
+                ("id", "id"),
+                ("firstName", '"firstName"'),
+                ("lastName", '"lastName"'),
+                ("displayName", '"displayName"'),
+                ("email", "email"),
+                ("dept", "dept"),
+                ("createdAt", '"createdAt"'),
+                ("updateSource", '"updateSource"'),
+            ])}
+            FROM "User"
+            WHERE "isDeleted" = false
+            ORDER BY id
+        """,
+        "csv": (
+            ["id", "firstName", "lastName", "displayName", "email", "dept",
+             "createdAt", "updateSource"],
+            """
+            SELECT id, "firstName", "lastName", "displayName", email, dept,
+                   "createdAt", "updateSource"
+            FROM "User"
+            WHERE "isDeleted" = false
+            ORDER BY id
+            """
+        ),
+    },
+}
+
+
+def csv_value(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def stream_rows(cur, fmt, header=None):
+    """
+    Fetch EXPORT_BATCH_SIZE rows at a time from the server-side cursor and
+    yield one chunk per batch.
+    """
+    batch = Config.EXPORT_BATCH_SIZE
+    if fmt == "csv":
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(header)
+        while True:
+            rows = cur.fetchmany(batch)
+            if not rows:
+                break
+            writer.writerows([csv_value(v) for v in row] for row in rows)
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+        if buf.tell():
+            yield buf.getvalue()
+    else:
+        while True:
+            rows = cur.fetchmany(batch)
+            if not rows:
+                break
+            yield "".join(r[0] + "\n" for r in rows)
+
+
+def export_releaser(conn, cur):
+    """
+    Close the cursor and hand the connection back, once. The export owns
+    its connection instead of using get_conn(): the app context (and the
+    connection bound to it) is torn down as soon as the view returns,
+    while the body is still being streamed.
+    """
+    released = []
+
+    def release():
+        if released:
+            return
+        released.append(True)
+        try:
+            cur.close()
+        except Exception:
+            pass
+        # Read-only: putconn rolls back the transaction the named cursor
+        # lived in (or discards a broken connection)
+        get_pool().putconn(conn)
+
+    return release
+
+
+# -----------------------------
+# 1. Stream an export
+# -----------------------------
+
+
+@export_bp.route("/<any(tasks, users, templates):kind>", methods=["GET"])
+@token_required
+def export(kind):
+    """
+    Query Params:
+        format: jsonl (default) | csv
+    """
+    fmt = request.args.get("format", "jsonl").lower()
+    if fmt not in ("jsonl", "csv"):
+        return jsonify({"success": False, "message": "format must be jsonl or csv"}), 400
+
+    spec = EXPORTS[kind][fmt]
+    header, sql = spec if fmt == "csv" else (None, spec)
+
+    # Named cursor = server-side: rows are fetched in batches, never all at once
+    conn = get_pool().getconn()
+    cur = conn.cursor(name=f"export_{kind}")
+    cur.itersize = Config.EXPORT_BATCH_SIZE
+    release = export_releaser(conn, cur)
+    try:
+        cur.execute(sql)
+    except Exception as e:
+        release()
+        return jsonify({"success": False, "message": str(e)}), 500
+
+    response = Response(
+        stream_rows(cur, fmt, header),
+        mimetype="text/csv" if fmt == "csv" else JSONL_MIMETYPE,
+        headers={
+            "Content-Disposition": f"attachment; filename={kind}.{fmt}",
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        }
+    )
+    # Runs when the server closes the body: after the last chunk, on a
+    # client disconnect, or if streaming never started
+    response.call_on_close(release)
+    return response
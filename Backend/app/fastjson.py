@@ -0,0 +1,74 @@
+"""
+Faster JSON for large list responses.
+
+`init_app` swaps Flask's stdlib-json provider for one backed by orjson
+when it is installed (JSON_PROVIDER=stdlib keeps the default). jsonify()
+and request.get_json() keep working unchanged; orjson also encodes
+datetimes natively.
+
+For the biggest lists, rows can skip Python dicts entirely: Postgres
+renders each row as JSON text (`json_object_sql`) and `json_list`
+only joins those strings.
+"""
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+from app.config import Config
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """DefaultJSONProvider with orjson doing the encoding and decoding."""
+
+    def _options(self):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def _dumpb(self, obj):
+        # Types orjson can't handle (Decimal, ...) fall back to Flask's rules
+        return orjson.dumps(obj, default=self.default, option=self._options())
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._dumpb(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._dumpb(obj), mimetype=self.mimetype)
+
+
+def init_app(app):
+    if orjson is not None and Config.JSON_PROVIDER.lower() != "stdlib":
+        app.json = OrjsonProvider(app)
+
+
+def json_object_sql(fields, as_text=True):
+    """
+    SQL expression rendering one row as JSON text (as_text=False keeps
+    the json value, e.g. to nest it in json_agg).
+    fields: [(json key, SQL expression), ...]
+    """
+    pairs = ", ".join(f"'{key}', {expr}" for key, expr in fields)
+    sql = f"json_build_object({pairs})"
+    return sql + "::text" if as_text else sql
+
+
+def json_list(items):
+    """Join pre-rendered JSON texts into a JSON array (still text)."""
+    return "[" + ",".join(items) + "]"
+
+
+def raw_response(body, status=200):
+    """Response for an already serialized JSON document."""
+    return current_app.response_class(body, status=status, mimetype="application/json")
@@ -1,8 +1,35 @@
 from flask import Blueprint, request, jsonify
-from app.db import get_cursor, conn
+from app.db import get_cursor, get_conn, insert_many
 from app.auth.utils import token_required
+from app.conditional import table_version, make_etag, not_modified, with_etag
+from app.jobs.queue import enqueue, accepted
 groups_bp = Blueprint("groups", __name__)
 
+
+def apply_group_members(cur, group_id, user_ids):
+    """Make the group's members exactly `user_ids`, touching only the difference."""
+    cur.execute(
+        'SELECT "userId" FROM "GroupMember" WHERE "groupId" = %s', (group_id,))
+    current_ids = {r[0] for r in cur.fetchall()}
+    wanted_ids = {int(uid) for uid in user_ids}
+
+    # Remove members that were dropped
+    removed = list(current_ids - wanted_ids)
+    if removed:
+        cur.execute(
+            'DELETE FROM "GroupMember" WHERE "groupId" = %s AND "userId" = ANY(%s)',
+            (group_id, removed)
+        )
+
+    # Add members that are new
+    added = sorted(wanted_ids - current_ids)
+    insert_many(
+        cur,
+        'INSERT INTO "GroupMember" ("groupId", "userId") VALUES %s',
+        [(group_id, uid) for uid in added]
+    )
+    return {"added": len(added), "removed": len(removed)}
+
 # -----------------------------
 # 1. Get all groups
 # -----------------------------
@@ -13,6 +40,11 @@ groups_bp = Blueprint("groups", __name__)
 def get_groups():
     cur = get_cursor()
     try:
+        etag = make_etag(*table_version(cur, "Group"))
+        unchanged = not_modified(etag)
+        if unchanged:
+            return unchanged
+
         cur.execute(
             '''
             SELECT id, name, "createdAt", "createdBy", email
@@ -21,7 +53,7 @@ def get_groups():
             ORDER BY "createdAt" DESC
             ''')
         groups = cur.fetchall()
-        return jsonify([
+        return with_etag(jsonify([
             {
                 "id": g[0],
                 "name": g[1],
@@ -30,9 +62,9 @@ def get_groups():
                 "email": g[4]
 
             } for g in groups
-        ])
+        ]), etag)
     except Exception as e:
-        conn.rollback()
+        get_conn().rollback()
         return jsonify({"success": False, "message": str(e)}), 500
 
 # -----------------------------
@@ -65,7 +97,83 @@ def get_group_members(group_id):
             for m in members
         ])
     except Exception as e:
-        conn.rollback()
+        get_conn().rollback()
+        return jsonify({"success": False, "message": str(e)}), 500
+
+# -----------------------------
+# 2b. Get groups together with their members (one query)
+# -----------------------------
+
+
+@groups_bp.route("/with-members", methods=["GET"])
+@token_required
+def get_groups_with_members():
+    """
+    Every non-deleted group with its (non-deleted) members, aggregated in a
+    single query instead of one /<id>/members call per group.
+    Query Params:
+        ids: optional comma-separated group ids to restrict to
+        full: "true" for member rows, otherwise just member ids
+    """
+    ids = request.args.get("ids", "").strip()
+    full = request.args.get("full", "false").lower() == "true"
+
+    group_ids = None
+    if ids:
+        try:
+            group_ids = [int(i) for i in ids.split(",") if i.strip()]
+        except ValueError:
+            return jsonify({"success": False, "message": "ids must be comma-separated integers"}), 400
+
+    if full:
+        members_sql = '''
+            COALESCE(
+                json_agg(json_build_object(
+                    'id', u.id,
+                    'firstName', u."firstName",
+                    'lastName', u."lastName",
+                    'displayName', u."displayName",
+                    'email', u.email,
+                    'dept', u."dept"
+                ) ORDER BY u."firstName") FILTER (WHERE u.id IS NOT NULL),
+                '[]'::json
+            )'''
+    else:
+        members_sql = '''
+            COALESCE(
+                array_agg(u.id ORDER BY u."firstName") FILTER (WHERE u.id IS NOT NULL),
+                '{}'
+            )'''
+
+    sql = f'''
+        SELECT g.id, g.name, g."createdAt", g."createdBy", g.email, {members_sql}
+        FROM "Group" g
+        LEFT JOIN "GroupMember" gm ON gm."groupId" = g.id
+        LEFT JOIN "User" u ON u.id = gm."userId" AND COALESCE(u."isDeleted", false)=false
+        WHERE COALESCE(g.is_deleted, false) = false
+    '''
+    params = ()
+    if group_ids is not None:
+        sql += " AND g.id = ANY(%s)"
+        params = (group_ids,)
+    sql += ' GROUP BY g.id ORDER BY g."createdAt" DESC'
+
+    cur = get_cursor()
+    try:
+        cur.execute(sql, params)
+        groups = cur.fetchall()
+        return jsonify([
+            {
+                "id": g[0],
+                "name": g[1],
+                "createdAt": g[2].isoformat() if g[2] else None,
+                "createdBy": g[3],
+                "email": g[4],
+                "members": g[5]
+            } for g in groups
+        ])
+    except Exception as e:
+        get_conn().rollback()
         return jsonify({"success": False, "message": str(e)}), 500
 
 # -----------------------------
@@ -81,10 +189,10 @@ def soft_delete_group(group_id):
         cur.execute(
             'UPDATE "Group" SET "is_deleted" = TRUE WHERE id = %s', (group_id,)
         )
-        conn.commit()
+        get_conn().commit()
         return jsonify({"success": True, "message": "Group soft deleted"})
     except Exception as e:
-        conn.rollback()
+        get_conn().rollback()
         return jsonify({"success": False, "message": str(e)}), 500
 
 # -----------------------------
@@ -109,7 +217,7 @@ def get_all_users():
             for u in users
         ])
     except Exception as e:
-        conn.rollback()
+        get_conn().rollback()
         return jsonify({"success": False, "message": str(e)}), 500
 
 # -----------------------------
@@ -119,23 +227,27 @@ def get_all_users():
 
 @groups_bp.route("/update_members/<int:group_id>", methods=["PUT"])
 @token_required
-def update_group_members(group_id):
+def update_group_members(current_user, group_id):
+    """
+    Query Params:
+        async: "true" to apply the change in the job queue (202 + job id)
+    """
     data = request.get_json()
     new_user_ids = data.get("userIds", [])
     cur = get_cursor()
     try:
-        # Remove all existing members
-        cur.execute(
-            'DELETE FROM "GroupMember" WHERE "groupId" = %s', (group_id,))
-
-        # Add new members
-        for uid in new_user_ids:
-            cur.execute(
-                'INSERT INTO "GroupMember" ("groupId", "userId") VALUES (%s, %s)',
-                (group_id, uid)
-            )
-        conn.commit()
+        if request.args.get("async", "false").lower() == "true":
+            job_id = enqueue(cur, "update_group_members", {
+                "groupId": group_id,
+                "userIds": [int(uid) for uid in new_user_ids]
+            }, created_by=current_user["email"])
+            get_conn().commit()
+            body, headers = accepted(job_id)
+            return jsonify(body), 202, headers
+
+        apply_group_members(cur, group_id, new_user_ids)
+        get_conn().commit()
         return jsonify({"success": True, "message": "Group members updated successfully"})
     except Exception as e:
-        conn.rollback()
+        get_conn().rollback()
         return jsonify({"success": False, "message": str(e)}), 500
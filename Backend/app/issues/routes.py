@@ -0,0 +1,231 @@
+import threading
+import time
+from flask import Blueprint, request, jsonify
+from app.db import get_cursor, get_conn
+from app.auth.utils import token_required
+from app.config import Config
+from app.subtasks import TASK_SUBTASKS
+from app.workflow.edges import sync_edges
+from app.workflow import engine
+
+issues_bp = Blueprint("issues", __name__)
+
+# (expires_at, payload) for /assignees
+_assignees = None
+_assignees_lock = threading.Lock()
+
+
+def issue_to_dict(r):
+    return {
+        "subtask_id": r[0],
+        "task_id": r[1],
+        "task_name": r[2],
+        "action": r[3],
+        "description": r[4],
+        "assignee": r[5],
+        "status": r[6],
+    }
+
+
+def my_assignee_values(cur, email):
+    """Every assignee string that means "me": my display name, full name and my groups."""
+    cur.execute('''
+        SELECT u."displayName", u."firstName" || ' ' || u."lastName",
+               COALESCE(array_agg(g.name) FILTER (WHERE g.id IS NOT NULL), '{}')
+        FROM "User" u
+        LEFT JOIN "GroupMember" gm ON gm."userId" = u.id
+        LEFT JOIN "Group" g ON g.id = gm."groupId" AND COALESCE(g.is_deleted, false) = false
+        WHERE u.email = %s AND COALESCE(u."isDeleted", false) = false
+        GROUP BY u.id
+        LIMIT 1
+    ''', (email,))
+    row = cur.fetchone()
+    if not row:
+        return []
+    return [v for v in {row[0], row[1].strip(), *row[2]} if v]
+
+
+# -----------------------------
+# 1. List open issues (task subtasks) per assignee
+# -----------------------------
+
+
+@issues_bp.route("/", methods=["GET"])
+@token_required
+def get_issues(current_user):
+    """
+    Query Params:
+        assignee: comma-separated assignee values; defaults to the caller's
+                  own name(s) and groups
+        all: "true" to list every assignee's issues
+        taskId: only subtasks of this task
+        q: substring match on the action
+        status: comma-separated statuses, or "all"; defaults to open
+                (everything not done)
+        limit: page size (default 50, max 500)
+        after: nextCursor from the previous page ("<taskId>:<subtaskId>")
+    """
+    show_all = request.args.get("all", "false").lower() == "true"
+    assignee = request.args.get("assignee", "").strip()
+    task_id = request.args.get("taskId", type=int)
+    q = request.args.get("q", "").strip()
+    status = request.args.get("status", "").strip().lower()
+    limit = min(max(request.args.get("limit", 50, type=int), 1), 500)
+    after = request.args.get("after", "").strip()
+
+    cursor_key = None
+    if after:
+        try:
+            after_task, after_subtask = (int(x) for x in after.split(":"))
+            cursor_key = (after_task, after_subtask)
+        except ValueError:
+            return jsonify({"success": False, "message": "Invalid cursor"}), 400
+
+    cur = get_cursor()
+    try:
+        where = ['t."isDeleted" = false']
+        params = []
+
+        if assignee:
+            assignees = [a.strip() for a in assignee.split(",") if a.strip()]
+        elif show_all:
+            assignees = None
+        else:
+            assignees = my_assignee_values(cur, current_user["email"])
+
+        if assignees is not None:
+            # Served by the ("assignee", "taskId") index
+            where.append("s.assignee = ANY(%s)")
+            params.append(assignees)
+        if task_id is not None:
+            where.append('s."taskId" = %s')
+            params.append(task_id)
+        if not status:
+            where.append("s.status <> %s")
+            params.append(engine.DONE)
+        elif status != "all":
+            statuses = [st.strip() for st in status.split(",") if st.strip()]
+            if not set(statuses) <= set(engine.STATUSES):
+                return jsonify({"success": False, "message": "Unknown status"}), 400
+            where.append("s.status = ANY(%s)")
+            params.append(statuses)
+        if q:
+            where.append("s.action ILIKE %s")
+            params.append(f"%{q}%")
+        if cursor_key:
+            where.append('(s."taskId", s.id) < (%s, %s)')
+            params.extend(cursor_key)
+
+        params.append(limit + 1)
+        cur.execute(f'''
+            SELECT s.id, s."taskId", t.name, s.action, s.description, s.assignee, s.status
+            FROM "TaskSubTask" s
+            JOIN "Task" t ON t.id = s."taskId"
+            WHERE {" AND ".join(where)}
+            ORDER BY s."taskId" DESC, s.id DESC
+            LIMIT %s
+        ''', tuple(params))
+        rows = cur.fetchall()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        return jsonify({
+            "issues": [issue_to_dict(r) for r in rows],
+            "pagination": {
+                "limit": limit,
+                "nextCursor": f"{rows[-1][1]}:{rows[-1][0]}" if has_more else None
+            }
+        })
+    except Exception as e:
+        get_conn().rollback()
+        return jsonify({"success": False, "message": str(e)}), 500
+
+# -----------------------------
+# 2. Assignee options (users + groups), cached
+# -----------------------------
+
+
+@issues_bp.route("/assignees", methods=["GET"])
+@token_required
+def get_assignees():
+    global _assignees
+    cached = _assignees
+    if cached and cached[0] > time.monotonic():
+        return jsonify(cached[1])
+
+    cur = get_cursor()
+    try:
+        # Values match what the task editor stores in "assignee"
+        cur.execute('''
+            SELECT 'user', id,
+                   COALESCE(NULLIF("displayName", ''), TRIM("firstName" || ' ' || "lastName"))
+            FROM "User"
+            WHERE COALESCE("isDeleted", false) = false
+            UNION ALL
+            SELECT 'group', id, name
+            FROM "Group"
+            WHERE COALESCE(is_deleted, false) = false
+            ORDER BY 1 DESC, 3
+        ''')
+        payload = {"users": [], "groups": []}
+        for kind, oid, name in cur.fetchall():
+            payload[f"{kind}s"].append({"key": f"{kind}-{oid}", "value": name, "text": name})
+
+        with _assignees_lock:
+            _assignees = (time.monotonic() + Config.ISSUES_ASSIGNEE_TTL, payload)
+        return jsonify(payload)
+    except Exception as e:
+        get_conn().rollback()
+        return jsonify({"success": False, "message": str(e)}), 500
+
+# -----------------------------
+# 3. Update an issue
+# -----------------------------
+
+
+@issues_bp.route("/<int:subtask_id>", methods=["PUT"])
+@token_required
+def update_issue(subtask_id):
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"success": False, "message": "Invalid JSON payload"}), 400
+
+    fields, values = [], []
+    for key in ["action", "description", "assignee"]:
+        if key in data:
+            if data[key] is not None and not isinstance(data[key], str):
+                return jsonify({"success": False, "message": f"{key} must be a string"}), 400
+            value = (data[key] or "").strip()
+            if not value:
+                return jsonify({"success": False, "message": f"{key} is required"}), 400
+            fields.append(f'"{key}"=%s')
+            values.append(value)
+    if not fields:
+        return jsonify({"success": False, "message": "No fields to update"}), 400
+
+    cur = get_cursor()
+    try:
+        values.append(subtask_id)
+        cur.execute(f'''
+            UPDATE "TaskSubTask" s
+            SET {", ".join(fields)}
+            FROM "Task" t
+            WHERE s.id = %s AND t.id = s."taskId" AND t."isDeleted" = false
+            RETURNING s.id, s."taskId", t.name, s.action, s.description, s.assignee, s.status
+        ''', tuple(values))
+        updated = cur.fetchone()
+        if not updated:
+            get_conn().rollback()
+            return jsonify({"success": False, "message": "Issue not found"}), 404
+
+        task_id = updated[1]
+        if "action" in data:
+            # Other steps may reference this one by action name
+            engine.refresh_state(cur, task_id, sync_edges(cur, TASK_SUBTASKS, task_id))
+        cur.execute('UPDATE "Task" SET revision = revision + 1 WHERE id=%s', (task_id,))
+
+        get_conn().commit()
+        return jsonify(issue_to_dict(updated))
+    except Exception as e:
+        get_conn().rollback()
+        return jsonify({"success": False, "message": str(e)}), 500
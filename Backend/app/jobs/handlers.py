@@ -0,0 +1,76 @@
+"""
+Job kinds the worker knows how to run.
+
+A handler gets (cur, payload) and returns a JSON-serialisable result.
+Its database writes commit together with the job's "done" mark. Raise
+PermanentError for failures a retry cannot fix; anything else is retried
+with backoff.
+
+Payloads are stored as plain JSONB (and end up in WAL and backups), so
+never enqueue secrets such as passwords.
+"""
+from app.config import Config
+
+HANDLERS = {}
+
+
+class PermanentError(Exception):
+    """Fail the job without further attempts."""
+
+
+def handler(kind):
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+@handler("update_group_members")
+def update_group_members(cur, payload):
+    from app.groups.routes import apply_group_members
+
+    cur.execute(
+        'SELECT 1 FROM "Group" WHERE id = %s AND COALESCE(is_deleted, false) = false',
+        (payload["groupId"],)
+    )
+    if not cur.fetchone():
+        raise PermanentError("Group not found")
+    return apply_group_members(cur, payload["groupId"], payload["userIds"])
+
+
+@handler("ollama_generate")
+def ollama_generate(cur, payload):
+    """Non-streaming generation through the same per-model limiter and cache as the route."""
+    from app.ollama.client import get_session, request_timeout, get_limiter, allowed_models
+    from app.ollama.cache import lookup
+    from app.ollama.routes import build_payload
+
+    if not isinstance(payload.get("model"), str) or not isinstance(payload.get("prompt"), str):
+        raise PermanentError("Model and prompt must be strings")
+    if payload["model"] not in allowed_models():
+        raise PermanentError(f"Unknown model {payload['model']!r}")
+
+    cache, key = lookup(payload)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    # QueueFull / QueueTimeout are worth a retry later
+    slot = get_limiter(payload["model"]).acquire()
+    try:
+        res = get_session().post(
+            f"{Config.OLLAMA_URL}/api/generate",
+            json=build_payload(payload),
+            timeout=request_timeout()
+        )
+    finally:
+        slot.release()
+
+    if 400 <= res.status_code < 500:
+        raise PermanentError(f"Ollama answered {res.status_code}: {res.text[:500]}")
+    res.raise_for_status()
+    result = res.json()
+    if cache is not None:
+        cache.set(key, result)
+    return result
@@ -0,0 +1,135 @@
+"""
+Postgres-backed job queue ("Job" table).
+
+Web requests `enqueue` and return at once; `worker.py` processes claim
+jobs with FOR UPDATE SKIP LOCKED, so any number of workers can poll the
+same table without handing one job to two of them. Failed attempts are
+retried with exponential backoff until "maxAttempts".
+"""
+import random
+from psycopg2.extras import Json
+from app.config import Config
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+JOB_COLUMNS = '''id, kind, status, attempts, "maxAttempts", "runAt", result,
+    "lastError", "createdBy", "createdAt", "finishedAt"'''
+
+
+def job_to_dict(r):
+    """Public view of a job; the payload is never echoed back."""
+    return {
+        "id": r[0],
+        "kind": r[1],
+        "status": r[2],
+        "attempts": r[3],
+        "maxAttempts": r[4],
+        "runAt": r[5].isoformat() if r[5] else None,
+        "result": r[6],
+        "error": r[7],
+        "createdBy": r[8],
+        "createdAt": r[9].isoformat() if r[9] else None,
+        "finishedAt": r[10].isoformat() if r[10] else None,
+    }
+
+
+def enqueue(cur, kind, payload, created_by=None, max_attempts=None):
+    cur.execute("""
+        INSERT INTO "Job" (kind, payload, "createdBy", "maxAttempts")
+        VALUES (%s, %s, %s, %s)
+        RETURNING id
+    """, (kind, Json(payload), created_by, max_attempts or Config.JOB_MAX_ATTEMPTS))
+    return cur.fetchone()[0]
+
+
+def claim(cur, worker_id, kinds=None):
+    """
+    Lock the next due job for `worker_id`, or return None.
+    The caller commits right away so the claim is visible to other workers.
+    """
+    kind_filter = "AND kind = ANY(%(kinds)s)" if kinds else ""
+    cur.execute(f"""
+        UPDATE "Job" j
+        SET status = %(running)s, "lockedAt" = NOW(), "lockedBy" = %(worker)s,
+            attempts = j.attempts + 1
+        FROM (
+            SELECT id FROM "Job"
+            WHERE status = %(queued)s AND "runAt" <= NOW() {kind_filter}
+            ORDER BY "runAt", id
+            LIMIT 1
+            FOR UPDATE SKIP LOCKED
+        ) next
+        WHERE j.id = next.id
+        RETURNING j.id, j.kind, j.payload, j.attempts, j."maxAttempts"
+    """, {"running": RUNNING, "queued": QUEUED, "worker": worker_id, "kinds": kinds})
+    row = cur.fetchone()
+    if row is None:
+        return None
+    return {"id": row[0], "kind": row[1], "payload": row[2], "attempts": row[3], "maxAttempts": row[4]}
+
+
+def backoff_seconds(attempts):
+    """JOB_BACKOFF_BASE * 2^(attempt-1), capped, with +-20% jitter."""
+    delay = min(Config.JOB_BACKOFF_BASE * 2 ** (attempts - 1), Config.JOB_BACKOFF_MAX)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def mark_done(cur, job_id, result=None):
+    cur.execute("""
+        UPDATE "Job"
+        SET status = %s, result = %s, "finishedAt" = NOW(), "lastError" = NULL,
+            "lockedAt" = NULL, "lockedBy" = NULL
+        WHERE id = %s
+    """, (DONE, Json(result), job_id))
+
+
+def mark_failed(cur, job, error, retry=True):
+    """Schedule another attempt, or give up after "maxAttempts" / permanent errors."""
+    if retry and job["attempts"] < job["maxAttempts"]:
+        cur.execute("""
+            UPDATE "Job"
+            SET status = %s, "runAt" = NOW() + make_interval(secs => %s),
+                "lastError" = %s, "lockedAt" = NULL, "lockedBy" = NULL
+            WHERE id = %s
+        """, (QUEUED, backoff_seconds(job["attempts"]), error, job["id"]))
+        return QUEUED
+    cur.execute("""
+        UPDATE "Job"
+        SET status = %s, "lastError" = %s, "finishedAt" = NOW(),
+            "lockedAt" = NULL, "lockedBy" = NULL
+        WHERE id = %s
+    """, (FAILED, error, job["id"]))
+    return FAILED
+
+
+def requeue_stale(cur):
+    """
+    Jobs whose worker died mid-run go back to the queue after
+    JOB_LOCK_TIMEOUT (or fail if they are out of attempts).
+    """
+    cur.execute("""
+        UPDATE "Job"
+        SET status = CASE WHEN attempts < "maxAttempts" THEN %s ELSE %s END,
+            "finishedAt" = CASE WHEN attempts < "maxAttempts" THEN NULL ELSE NOW() END,
+            "lockedAt" = NULL, "lockedBy" = NULL,
+            "lastError" = 'Worker lost while running the job'
+        WHERE status = %s AND "lockedAt" < NOW() - make_interval(secs => %s)
+    """, (QUEUED, FAILED, RUNNING, Config.JOB_LOCK_TIMEOUT))
+    return cur.rowcount
+
+
+def get_job(cur, job_id):
+    cur.execute(f'SELECT {JOB_COLUMNS} FROM "Job" WHERE id = %s', (job_id,))
+    row = cur.fetchone()
+    return job_to_dict(row) if row else None
+
+
+def accepted(job_id):
+    """Body + headers for a 202 answer to an async request."""
+    return (
+        {"success": True, "jobId": job_id, "status": QUEUED},
+        {"Location": f"/api/jobs/{job_id}"}
+    )
@@ -0,0 +1,61 @@
+from flask import Blueprint, request, jsonify
+from app.db import get_cursor, get_conn
+from app.auth.utils import token_required
+from app.jobs.queue import JOB_COLUMNS, job_to_dict, get_job, QUEUED, RUNNING, DONE, FAILED
+
+jobs_bp = Blueprint("jobs", __name__)
+
+# -----------------------------
+# 1. Status of one job
+# -----------------------------
+
+
+@jobs_bp.route("/<int:job_id>", methods=["GET"])
+@token_required
+def get_job_status(current_user, job_id):
+    cur = get_cursor()
+    try:
+        job = get_job(cur, job_id)
+        # Only the user who queued a job can see it (results may be private)
+        if job is None or job["createdBy"] != current_user["email"]:
+            return jsonify({"success": False, "message": "Job not found"}), 404
+        return jsonify(job)
+    except Exception as e:
+        get_conn().rollback()
+        return jsonify({"success": False, "message": str(e)}), 500
+
+# -----------------------------
+# 2. My recent jobs
+# -----------------------------
+
+
+@jobs_bp.route("/", methods=["GET"])
+@token_required
+def list_jobs(current_user):
+    """
+    Query Params:
+        status: queued | running | done | failed
+        limit: default 20, max 100
+    """
+    status = request.args.get("status", "").strip().lower()
+    if status and status not in (QUEUED, RUNNING, DONE, FAILED):
+        return jsonify({"success": False, "message": "Unknown status"}), 400
+    limit = min(max(request.args.get("limit", 20, type=int), 1), 100)
+
+    cur = get_cursor()
+    try:
+        where, params = ['"createdBy" = %s'], [current_user["email"]]
+        if status:
+            where.append("status = %s")
+            params.append(status)
+        params.append(limit)
+        cur.execute(f'''
+            SELECT {JOB_COLUMNS} FROM "Job"
+            WHERE {" AND ".join(where)}
+            ORDER BY id DESC
+            LIMIT %s
+        ''', tuple(params))
+        return jsonify({"jobs": [job_to_dict(r) for r in cur.fetchall()]})
+    except Exception as e:
+        get_conn().rollback()
+        return jsonify({"success": False, "message": str(e)}), 500
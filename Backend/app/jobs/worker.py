@@ -0,0 +1,99 @@
+"""
+Worker pool draining the "Job" table; started by Backend/worker.py.
+
+JOB_WORKER_CONCURRENCY threads each claim one job at a time, so heavy
+work runs at that fixed concurrency per worker process however many web
+requests queue it. Each job runs in its own app context (and pooled
+connection); its writes commit together with the "done" mark.
+"""
+import os
+import signal
+import socket
+import threading
+import time
+from app.config import Config
+from app.db import get_cursor, get_conn
+from app.jobs.queue import claim, mark_done, mark_failed, requeue_stale
+from app.jobs.handlers import HANDLERS, PermanentError
+
+STALE_CHECK_INTERVAL = 60
+
+
+def run_one(app, worker_id, kinds=None):
+    """Claim and run a single job. Returns False when nothing was due."""
+    with app.app_context():
+        cur = get_cursor()
+        job = claim(cur, worker_id, kinds)
+        get_conn().commit()
+        if job is None:
+            return False
+
+        try:
+            fn = HANDLERS.get(job["kind"])
+            if fn is None:
+                raise PermanentError(f"Unknown job kind {job['kind']}")
+            result = fn(cur, job["payload"])
+            mark_done(cur, job["id"], result)
+            get_conn().commit()
+            app.logger.info("job %s (%s) done", job["id"], job["kind"])
+        except Exception as e:
+            get_conn().rollback()
+            status = mark_failed(
+                cur, job, str(e) or e.__class__.__name__,
+                retry=not isinstance(e, PermanentError)
+            )
+            get_conn().commit()
+            app.logger.warning("job %s (%s) %s: %s", job["id"], job["kind"], status, e)
+        return True
+
+
+def worker_loop(app, worker_id, kinds, stop):
+    while not stop.is_set():
+        try:
+            ran = run_one(app, worker_id, kinds)
+        except Exception as e:
+            # Database unreachable and the like: back off, keep the thread alive
+            app.logger.error("worker %s: %s", worker_id, e)
+            ran = False
+        if not ran:
+            stop.wait(Config.JOB_POLL_INTERVAL)
+
+
+def maintenance_loop(app, stop):
+    while not stop.wait(STALE_CHECK_INTERVAL):
+        try:
+            with app.app_context():
+                requeued = requeue_stale(get_cursor())
+                get_conn().commit()
+            if requeued:
+                app.logger.warning("requeued %s stale job(s)", requeued)
+        except Exception as e:
+            app.logger.error("stale job check failed: %s", e)
+
+
+def run_worker(app, concurrency=None, kinds=None):
+    """Block until SIGINT/SIGTERM; running jobs are allowed to finish."""
+    concurrency = concurrency or Config.JOB_WORKER_CONCURRENCY
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    threads = [
+        threading.Thread(
+            target=worker_loop, args=(app, f"{prefix}:{i}", kinds, stop),
+            name=f"job-worker-{i}", daemon=True
+        )
+        for i in range(concurrency)
+    ]
+    threads.append(threading.Thread(
+        target=maintenance_loop, args=(app, stop), name="job-maintenance", daemon=True
+    ))
+    for t in threads:
+        t.start()
+    app.logger.info("job worker %s running %s thread(s)", prefix, concurrency)
+
+    while not stop.is_set():
+        time.sleep(0.5)
+    for t in threads:
+        t.join()
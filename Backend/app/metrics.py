@@ -0,0 +1,225 @@
+"""
+Request metrics in Prometheus text format at GET /metrics.
+
+A before_request hook starts the clock and teardown_request records
+every Flask request, including ones that died with an unhandled
+exception (counted as 500). A query observer on get_cursor() cursors
+adds up statements, DB time and rows per request. The natively served
+ASGI Ollama route reports through observe() (see app/asgi.py).
+Per endpoint we keep a latency histogram plus query, DB time, row and
+response byte counters. Ollama limiter stats and connection pool stats
+are read at scrape time.
+
+Values are per process: with several workers, scrape each one or sum
+them in Prometheus. Streamed responses are timed until their headers
+are sent.
+"""
+import threading
+import time
+from flask import g, request, Response, has_app_context
+from app import db
+from app.config import Config
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class EndpointStats:
+    __slots__ = ("buckets", "count", "seconds", "queries", "db_seconds", "rows", "bytes")
+
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.seconds = 0.0
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.rows = 0
+        self.bytes = 0
+
+    def observe(self, seconds, queries, db_seconds, rows, size):
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+        self.count += 1
+        self.seconds += seconds
+        self.queries += queries
+        self.db_seconds += db_seconds
+        self.rows += rows
+        self.bytes += size
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (endpoint, method, status) -> EndpointStats
+        self._endpoints = {}
+
+    def observe(self, key, *values):
+        with self._lock:
+            stats = self._endpoints.get(key)
+            if stats is None:
+                stats = self._endpoints[key] = EndpointStats()
+            stats.observe(*values)
+
+    def snapshot(self):
+        with self._lock:
+            return [
+                (key, list(s.buckets), s.count, s.seconds, s.queries, s.db_seconds, s.rows, s.bytes)
+                for key, s in self._endpoints.items()
+            ]
+
+
+registry = Registry()
+
+
+# -----------------------------
+# Hooks
+# -----------------------------
+
+
+def count_query(cursor, sql, params, seconds):
+    stats = g.get("_query_stats") if has_app_context() else None
+    if stats is None:
+        return
+    stats[0] += 1
+    stats[1] += seconds
+    if cursor.description is not None and cursor.rowcount > 0:
+        stats[2] += cursor.rowcount
+
+
+def start_timer():
+    g._request_started = time.perf_counter()
+    # [queries, db seconds, rows]
+    g._query_stats = [0, 0.0, 0]
+
+
+def capture_response(response):
+    # Recorded at teardown, which also sees requests that never got here
+    g._response_status = response.status_code
+    g._response_size = 0 if response.is_streamed else response.calculate_content_length() or 0
+    return response
+
+
+def record_request(exc=None):
+    started = g.pop("_request_started", None)
+    stats = g.pop("_query_stats", None)
+    status = g.pop("_response_status", None)
+    size = g.pop("_response_size", 0)
+    if started is None or stats is None:
+        return
+    registry.observe(
+        (request.endpoint or "unmatched", request.method, str(status or 500)),
+        time.perf_counter() - started, stats[0], stats[1], stats[2], size
+    )
+
+
+def observe(endpoint, method, status, seconds, size=0):
+    """Record a request served outside Flask (no DB statements)."""
+    if Config.METRICS_ENABLED:
+        registry.observe((endpoint, method, str(status)), seconds, 0, 0.0, 0, size)
+
+
+# -----------------------------
+# Exposition
+# -----------------------------
+
+
+def label_str(**labels):
+    parts = []
+    for name, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{name}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def render():
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for suffix, labels, value in samples:
+            lines.append(f"{name}{suffix}{label_str(**labels)} {value}")
+
+    snapshot = registry.snapshot()
+    histogram = []
+    for (endpoint, method, status), buckets, count, seconds, *_ in snapshot:
+        labels = {"endpoint": endpoint, "method": method, "status": status}
+        running = 0
+        for bound, n in zip(LATENCY_BUCKETS, buckets):
+            running += n
+            histogram.append(("_bucket", {**labels, "le": bound}, running))
+        histogram.append(("_bucket", {**labels, "le": "+Inf"}, count))
+        histogram.append(("_sum", labels, round(seconds, 6)))
+        histogram.append(("_count", labels, count))
+    metric("http_request_duration_seconds", "histogram",
+           "Time spent handling requests per endpoint.", histogram)
+
+    counters = (
+        ("db_queries_total", "SQL statements run while handling requests.", 4),
+        ("db_query_seconds_total", "Time spent in SQL statements.", 5),
+        ("db_rows_total", "Rows returned by SQL statements.", 6),
+        ("http_response_bytes_total", "Response body bytes (streamed Flask bodies not counted).", 7),
+    )
+    for name, help_text, index in counters:
+        samples = []
+        for row in snapshot:
+            endpoint, method, status = row[0]
+            value = row[index]
+            samples.append((
+                "", {"endpoint": endpoint, "method": method, "status": status},
+                round(value, 6) if isinstance(value, float) else value
+            ))
+        metric(name, "counter", help_text, samples)
+
+    pool = db._pool
+    if pool is not None:
+        stats = pool.stats()
+        for key, name, help_text in (
+            ("max", "db_pool_max", "Connection pool size limit."),
+            ("open", "db_pool_open", "Open database connections."),
+            ("idle", "db_pool_idle", "Idle pooled connections."),
+            ("inUse", "db_pool_in_use", "Connections checked out by requests."),
+        ):
+            metric(name, "gauge", help_text, [("", {}, stats[key])])
+
+    from app.ollama.client import limiter_stats
+    models = limiter_stats()
+    if models:
+        metric("ollama_active_generations", "gauge", "Generations running per model.",
+               [("", {"model": m}, s["active"]) for m, s in models.items()])
+        metric("ollama_waiting_requests", "gauge", "Requests queued for a generation slot.",
+               [("", {"model": m}, s["waiting"]) for m, s in models.items()])
+        metric("ollama_rejected_total", "counter", "Requests refused because the queue was full.",
+               [("", {"model": m}, s["rejected"]) for m, s in models.items()])
+        metric("ollama_queue_timeouts_total", "counter", "Requests that gave up waiting for a slot.",
+               [("", {"model": m}, s["timedOut"]) for m, s in models.items()])
+        for key, name, help_text in (
+            ("queueWaitSeconds", "ollama_queue_wait_seconds", "Time spent waiting for a generation slot."),
+            ("generationSeconds", "ollama_generation_seconds", "Upstream generation time."),
+        ):
+            metric(name, "summary", help_text, [
+                sample
+                for m, s in models.items()
+                for sample in (("_sum", {"model": m}, s[key]["sum"]),
+                               ("_count", {"model": m}, s[key]["count"]))
+            ])
+
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view():
+    if Config.METRICS_TOKEN:
+        if request.headers.get("Authorization") != f"Bearer {Config.METRICS_TOKEN}":
+            return Response("Unauthorized\n", status=401, mimetype="text/plain")
+    return Response(render(), mimetype="text/plain; version=0.0.4")
+
+
+def init_app(app):
+    if not Config.METRICS_ENABLED:
+        return
+    db.observe_queries(count_query)
+    app.before_request(start_timer)
+    app.after_request(capture_response)
+    app.teardown_request(record_request)
+    app.add_url_rule("/metrics", "metrics", metrics_view, methods=["GET"])
@@ -0,0 +1,187 @@
+"""
+Opt-in response cache for the Ollama proxy (OLLAMA_CACHE_ENABLED).
+
+Entries are keyed by model, whitespace-normalised prompt and generation
+options. Lookups hit an in-process LRU/TTL tier first and, when
+OLLAMA_CACHE_PATH is set, a SQLite file shared by every worker process
+on the host; disk hits are promoted into memory.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from app.config import Config
+
+
+def normalize_prompt(prompt):
+    return " ".join(prompt.split())
+
+
+def cache_key(model, prompt, options):
+    raw = json.dumps(
+        [model, normalize_prompt(prompt), options or {}],
+        sort_keys=True,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class MemoryTier:
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires):
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SqliteTier:
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS ollama_cache "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, expires FROM ollama_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, value, expires):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO ollama_cache (key, value, expires) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires)
+            )
+            self._db.commit()
+
+
+class ResponseCache:
+    def __init__(self, max_entries, ttl, path=None):
+        self.ttl = ttl
+        self.memory = MemoryTier(max_entries, ttl)
+        self.disk = SqliteTier(path) if path else None
+        self._lock = threading.Lock()
+        self.counters = {"memoryHits": 0, "diskHits": 0, "misses": 0, "stores": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            self._count("memoryHits")
+            return value
+        if self.disk is not None:
+            found = self.disk.get(key)
+            if found is not None:
+                value, expires = found
+                self.memory.set(key, value, expires)
+                self._count("diskHits")
+                return value
+        self._count("misses")
+        return None
+
+    def set(self, key, value):
+        expires = time.time() + self.ttl
+        self.memory.set(key, value, expires)
+        if self.disk is not None:
+            self.disk.set(key, value, expires)
+        self._count("stores")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        stats["memoryEntries"] = len(self.memory)
+        return stats
+
+
+class StreamCollector:
+    """Rebuilds the non-streaming response shape from streamed NDJSON chunks."""
+
+    def __init__(self):
+        self.parts = []
+        self.final = None
+
+    def feed(self, line):
+        try:
+            chunk = json.loads(line)
+        except ValueError:
+            return
+        self.parts.append(chunk.get("response", ""))
+        if chunk.get("done"):
+            self.final = chunk
+
+    def result(self):
+        # Only a generation that ran to completion is worth caching
+        if self.final is None:
+            return None
+        result = dict(self.final)
+        result["response"] = "".join(self.parts)
+        return result
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """The process-wide cache, or None when caching is disabled."""
+    global _cache
+    if not Config.OLLAMA_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(
+                    Config.OLLAMA_CACHE_SIZE,
+                    Config.OLLAMA_CACHE_TTL,
+                    Config.OLLAMA_CACHE_PATH or None
+                )
+    return _cache
+
+
+def lookup(data):
+    """
+    Resolve (cache, key) for a request payload. Both are None when caching
+    is disabled, the client opted out with "cache": false, or the payload
+    can't be keyed (non-string model or prompt).
+    """
+    cache = get_cache()
+    if cache is None or data.get("cache") is False:
+        return None, None
+    if not isinstance(data.get("model"), str) or not isinstance(data.get("prompt"), str):
+        return None, None
+    return cache, cache_key(data.get("model"), data.get("prompt"), data.get("options"))
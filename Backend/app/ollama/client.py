@@ -0,0 +1,224 @@
+"""
+Shared plumbing for talking to the Ollama server: one keep-alive HTTP
+session for the whole process and a per-model concurrency limiter with a
+bounded wait queue, so a burst of chat users queues (or is turned away
+quickly) instead of piling parallel generations onto the model server.
+Only models listed in OLLAMA_MODELS get a limiter, so made-up model names
+can neither grow the limiter table nor claim a fresh concurrency budget.
+"""
+import asyncio
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from app.config import Config
+
+
+class QueueFull(Exception):
+    """Too many requests are already waiting for this model."""
+
+
+class QueueTimeout(Exception):
+    """Waited OLLAMA_QUEUE_TIMEOUT seconds without getting a slot."""
+
+
+class UnknownModel(ValueError):
+    """The model is not listed in OLLAMA_MODELS."""
+
+
+# ===============================
+# HTTP SESSION
+# ===============================
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=Config.OLLAMA_POOL_SIZE
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def request_timeout():
+    """(connect, read) tuple for requests; read applies between streamed chunks too."""
+    return (Config.OLLAMA_CONNECT_TIMEOUT, Config.OLLAMA_READ_TIMEOUT)
+
+
+# ===============================
+# METRICS
+# ===============================
+class Timing:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": round(self.total, 6),
+            "avg": round(self.total / self.count, 6) if self.count else 0.0,
+            "max": round(self.max, 6),
+        }
+
+
+class ModelStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.queue_wait = Timing()
+        self.generation = Timing()
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                "active": self.active,
+                "waiting": self.waiting,
+                "rejected": self.rejected,
+                "timedOut": self.timed_out,
+                "queueWaitSeconds": self.queue_wait.to_dict(),
+                "generationSeconds": self.generation.to_dict(),
+            }
+
+
+class Slot:
+    """A held generation slot; release() is idempotent and records generation time."""
+
+    def __init__(self, release, stats, queue_wait):
+        self._release = release
+        self.stats = stats
+        self.queue_wait = queue_wait
+        self.started = time.monotonic()
+        self.released = False
+
+    def release(self):
+        if self.released:
+            return
+        self.released = True
+        with self.stats.lock:
+            self.stats.active -= 1
+            self.stats.generation.observe(time.monotonic() - self.started)
+        self._release()
+
+
+# ===============================
+# LIMITERS
+# ===============================
+class ModelLimiter:
+    """
+    At most `concurrency` generations per model run at once. Up to
+    `max_queue` further callers wait (for at most `queue_timeout` seconds);
+    anyone beyond that is rejected immediately with QueueFull.
+    """
+
+    def __init__(self, concurrency, max_queue, queue_timeout):
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.stats = ModelStats()
+        self._slots = threading.BoundedSemaphore(concurrency)
+
+    def acquire(self):
+        started = time.monotonic()
+        if not self._slots.acquire(blocking=False):
+            with self.stats.lock:
+                if self.stats.waiting >= self.max_queue:
+                    self.stats.rejected += 1
+                    raise QueueFull()
+                self.stats.waiting += 1
+            try:
+                acquired = self._slots.acquire(timeout=self.queue_timeout)
+            finally:
+                with self.stats.lock:
+                    self.stats.waiting -= 1
+            if not acquired:
+                with self.stats.lock:
+                    self.stats.timed_out += 1
+                raise QueueTimeout()
+        return self._granted(started, self._slots.release)
+
+    def _granted(self, started, release):
+        queue_wait = time.monotonic() - started
+        with self.stats.lock:
+            self.stats.active += 1
+            self.stats.queue_wait.observe(queue_wait)
+        return Slot(release, self.stats, queue_wait)
+
+
+class AsyncModelLimiter(ModelLimiter):
+    """Same policy for the ASGI path, waiting on the event loop instead of a thread."""
+
+    def __init__(self, concurrency, max_queue, queue_timeout):
+        super().__init__(concurrency, max_queue, queue_timeout)
+        self._slots = asyncio.Semaphore(concurrency)
+
+    async def acquire(self):
+        started = time.monotonic()
+        if self._slots.locked():
+            with self.stats.lock:
+                if self.stats.waiting >= self.max_queue:
+                    self.stats.rejected += 1
+                    raise QueueFull()
+                self.stats.waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                with self.stats.lock:
+                    self.stats.timed_out += 1
+                raise QueueTimeout()
+            finally:
+                with self.stats.lock:
+                    self.stats.waiting -= 1
+        else:
+            await self._slots.acquire()
+        return self._granted(started, self._slots.release)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def allowed_models():
+    return {m.strip() for m in Config.OLLAMA_MODELS.split(",") if m.strip()}
+
+
+def get_limiter(model, limiter_class=ModelLimiter):
+    if model not in allowed_models():
+        raise UnknownModel(model)
+    key = (limiter_class, model)
+    limiter = _limiters.get(key)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(key)
+            if limiter is None:
+                limiter = limiter_class(
+                    Config.OLLAMA_MAX_CONCURRENCY,
+                    Config.OLLAMA_MAX_QUEUE,
+                    Config.OLLAMA_QUEUE_TIMEOUT
+                )
+                _limiters[key] = limiter
+    return limiter
+
+
+def limiter_stats():
+    stats = {}
+    for (_, model), limiter in list(_limiters.items()):
+        stats[model] = limiter.stats.to_dict()
+    return stats
@@ -1,12 +1,91 @@
-from flask import Blueprint, request, jsonify, abort
-import requests
+import json
+from flask import Blueprint, request, jsonify, abort, Response
 from app.auth.utils import token_required
+from app.config import Config
+from app.ollama.client import (
+    get_session, request_timeout, get_limiter, limiter_stats, allowed_models,
+    QueueFull, QueueTimeout
+)
+from app.ollama.cache import get_cache, lookup, StreamCollector
+from app.db import get_cursor, get_conn
+from app.jobs.queue import enqueue, accepted
 
 ollama_bp = Blueprint("ollama", __name__)
 
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+
+def wants_ndjson(accept_header):
+    """Clients that ask for NDJSON get Ollama's chunks verbatim, everyone else SSE."""
+    return NDJSON_MIMETYPE in (accept_header or "")
+
+
+def frame_chunk(line, ndjson):
+    if ndjson:
+        return line + b"\n"
+    return b"data: " + line + b"\n\n"
+
+
+def stream_headers():
+    return {
+        "Cache-Control": "no-cache",
+        # Stop nginx and friends from buffering the stream
+        "X-Accel-Buffering": "no",
+    }
+
+
+def build_payload(data):
+    payload = {
+        "model": data.get("model"),
+        "prompt": data.get("prompt"),
+        "stream": data.get("stream", False)
+    }
+    if data.get("options"):
+        payload["options"] = data["options"]
+    return payload
+
+
+def cached_chunk(cached, ndjson):
+    """A cache hit replayed to a streaming client as a single final chunk."""
+    return frame_chunk(json.dumps(cached).encode("utf-8"), ndjson)
+
+
+def busy_response(e):
+    if isinstance(e, QueueFull):
+        return jsonify({"error": "Too many pending requests for this model"}), 429, {"Retry-After": "5"}
+    return jsonify({"error": "Timed out waiting for the model"}), 503, {"Retry-After": "5"}
+
+
+def relay_stream(upstream, ndjson, slot, store=None):
+    """
+    Re-frame Ollama's NDJSON lines for the browser as they arrive.
+
+    The generator only pulls the next chunk from Ollama once the previous one
+    was written to the client, so a slow reader throttles the upstream read.
+    When the client goes away the server closes this generator and the
+    finally-block drops the upstream connection, which makes Ollama stop
+    generating. The model slot is held until the stream ends.
+
+    `store`, when given, receives the reassembled response once the
+    generation completes so it can be cached.
+    """
+    collector = StreamCollector() if store else None
+    try:
+        for line in upstream.iter_lines():
+            if line:
+                if collector:
+                    collector.feed(line)
+                yield frame_chunk(line, ndjson)
+        if collector and collector.result():
+            store(collector.result())
+    finally:
+        upstream.close()
+        slot.release()
+
+
 @ollama_bp.route("/", methods=["POST"])
 @token_required
-def ollama_chat():
+def ollama_chat(current_user):
     data = request.get_json()
     model = data.get("model")
     prompt = data.get("prompt")
@@ -14,18 +93,84 @@ def ollama_chat():
 
     if not model or not prompt:
         abort(400, description="Model and prompt are required.")
+    if not isinstance(model, str) or not isinstance(prompt, str):
+        abort(400, description="Model and prompt must be strings.")
+    if model not in allowed_models():
+        abort(400, description="Unknown model.")
+
+    if data.get("async") and not stream:
+        # Generated by worker.py; poll /api/jobs/<id> for the result
+        cur = get_cursor()
+        job_id = enqueue(cur, "ollama_generate", {
+            k: data[k] for k in ("model", "prompt", "options", "cache") if k in data
+        }, created_by=current_user["email"])
+        get_conn().commit()
+        body, headers = accepted(job_id)
+        return jsonify(body), 202, headers
+
+    ndjson = wants_ndjson(request.headers.get("Accept"))
+    cache, key = lookup(data)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            if not stream:
+                return jsonify(cached), 200, {"X-Cache": "HIT"}
+            headers = stream_headers()
+            headers["X-Cache"] = "HIT"
+            return Response(
+                [cached_chunk(cached, ndjson)],
+                mimetype=NDJSON_MIMETYPE if ndjson else "text/event-stream",
+                headers=headers
+            )
+
+    try:
+        slot = get_limiter(model).acquire()
+    except (QueueFull, QueueTimeout) as e:
+        return busy_response(e)
 
     try:
-        ollama_res = requests.post(
-            "http://localhost:11434/api/generate",
-            json={
-                "model": model,
-                "prompt": prompt,
-                "stream": stream
-            }
+        ollama_res = get_session().post(
+            f"{Config.OLLAMA_URL}/api/generate",
+            json=build_payload(data),
+            stream=bool(stream),
+            timeout=request_timeout()
         )
 
-        return jsonify(ollama_res.json())
+        if not stream:
+            slot.release()
+            result = ollama_res.json()
+            if cache is not None and ollama_res.status_code == 200:
+                cache.set(key, result)
+            return jsonify(result)
+
+        if ollama_res.status_code != 200:
+            body = ollama_res.content
+            ollama_res.close()
+            slot.release()
+            return Response(body, status=ollama_res.status_code, mimetype="application/json")
+
+        store = (lambda result: cache.set(key, result)) if cache is not None else None
+        response = Response(
+            relay_stream(ollama_res, ndjson, slot, store),
+            mimetype=NDJSON_MIMETYPE if ndjson else "text/event-stream",
+            headers=stream_headers()
+        )
+        # A generator that never started has no finally to run
+        response.call_on_close(ollama_res.close)
+        response.call_on_close(slot.release)
+        return response
 
     except Exception as e:
+        slot.release()
         return jsonify({"error": str(e)}), 500
+
+
+@ollama_bp.route("/metrics", methods=["GET"])
+@token_required
+def ollama_metrics():
+    """Per-model queue depth, rejections, queue wait and generation time, plus cache counters."""
+    cache = get_cache()
+    return jsonify({
+        "models": limiter_stats(),
+        "cache": cache.stats() if cache is not None else None
+    }), 200
@@ -0,0 +1,236 @@
+"""
+Opt-in slow-query log (QUERY_TRACE_ENABLED=true).
+
+A query observer on get_cursor() cursors (see app/db.py) records every
+statement slower than QUERY_SLOW_MS in a ring buffer of QUERY_TRACE_SIZE
+entries, together with the request that ran it. What gets stored is
+redacted: parameters only by type; quoted and numeric literals in the
+SQL text become '?' / ? (execute_values inlines its rows, and a VALUES
+list is cut down to its first row); in plans the same happens on the
+condition/filter lines, which are the ones that show bound values.
+
+For a QUERY_EXPLAIN_RATE fraction of slow SELECTs the statement is run a
+second time under EXPLAIN (ANALYZE, BUFFERS), on a plain cursor of the
+same connection inside a savepoint, so the plan sees the same snapshot
+and a failing EXPLAIN can't break the request's transaction. That second
+run adds to the request's latency, so keep the rate low outside
+development.
+
+Every traced request also gets a Server-Timing header with its query
+count and DB time.
+
+  GET    /api/admin/queries             newest first (?limit=, ?group=1
+                                        sums the buffer per statement)
+  DELETE /api/admin/queries             clear the buffer
+
+Only emails in QUERY_TRACE_ADMINS may read the buffer.
+"""
+import random
+import re
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from flask import g, request, jsonify, has_app_context, has_request_context, current_app
+from psycopg2 import extensions
+from app import db
+from app.config import Config
+from app.auth.utils import token_required, is_admin
+
+# '...' literals, with '' escapes
+_LITERAL = re.compile(r"'(?:[^']|'')*'")
+# Numbers that aren't part of an identifier ("t1", "Task_2"), $n or a quoted name
+_NUMBER = re.compile(r'(?<![\w$".])\d+(?:\.\d+)?(?:[eE][+-]?\d+)?(?![\w"])')
+# VALUES (...), (...), ... as written by execute_values (one level of nested parens)
+_ROWS = re.compile(r"(VALUES\s*)(\((?:[^()]|\([^()]*\))*\))(?:\s*,\s*\((?:[^()]|\([^()]*\))*\))+",
+                   re.IGNORECASE)
+# Plan lines that can show bound values: Index Cond, Filter, Hash Cond, ...
+_PLAN_VALUES = re.compile(r"^\s*(?:->\s*)?[\w -]*(?:Cond|Filter|Key|Output):")
+_SPACE = re.compile(r"\s+")
+
+_entries = deque(maxlen=max(Config.QUERY_TRACE_SIZE, 1))
+_lock = threading.Lock()
+
+
+def redact_literals(text):
+    return _NUMBER.sub("?", _LITERAL.sub("'?'", text))
+
+
+def scrub(text):
+    """Collapse whitespace, drop literals and inlined rows, cap the length."""
+    text = _SPACE.sub(" ", redact_literals(text)).strip()
+    text = _ROWS.sub(r"\1\2, ...", text)
+    if len(text) > Config.QUERY_TRACE_SQL_MAX:
+        text = text[:Config.QUERY_TRACE_SQL_MAX] + " ..."
+    return text
+
+
+def redact_value(value):
+    if value is None:
+        return "NULL"
+    if isinstance(value, (list, tuple)):
+        return f"<{type(value).__name__}[{len(value)}]>"
+    return f"<{type(value).__name__}>"
+
+
+def redact(params):
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {k: redact_value(v) for k, v in params.items()}
+    return [redact_value(v) for v in params]
+
+
+def scrub_plan(plan):
+    """Redact values on condition lines; costs, row counts and buffers stay."""
+    return "\n".join(
+        redact_literals(line) if _PLAN_VALUES.match(line) else _LITERAL.sub("'?'", line)
+        for line in plan.splitlines()
+    )
+
+
+def is_select(sql):
+    return sql.lstrip().lower().startswith("select")
+
+
+def explain(cursor, sql, params):
+    """Plan text for an already-run SELECT, or None if it can't be explained."""
+    conn = cursor.connection
+    if conn.get_transaction_status() == extensions.TRANSACTION_STATUS_INERROR:
+        return None
+
+    # Plain cursor: the EXPLAIN itself is neither observed nor traced
+    cur = conn.cursor(cursor_factory=extensions.cursor)
+    savepoint = not conn.autocommit
+    try:
+        if savepoint:
+            cur.execute("SAVEPOINT query_trace_explain")
+        try:
+            cur.execute("EXPLAIN (ANALYZE, BUFFERS) " + sql, params)
+            plan = "\n".join(r[0] for r in cur.fetchall())
+        except Exception as e:
+            if savepoint:
+                cur.execute("ROLLBACK TO SAVEPOINT query_trace_explain")
+            current_app.logger.warning("EXPLAIN of slow query failed: %s", e)
+            return None
+        if savepoint:
+            cur.execute("RELEASE SAVEPOINT query_trace_explain")
+        return scrub_plan(plan)
+    finally:
+        cur.close()
+
+
+# -----------------------------
+# Hooks
+# -----------------------------
+
+
+def trace_query(cursor, sql, params, seconds):
+    if has_app_context():
+        stats = g.get("_trace_stats")
+        if stats is not None:
+            stats[0] += 1
+            stats[1] += seconds
+
+    if seconds * 1000 < Config.QUERY_SLOW_MS:
+        return
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", "replace")
+
+    entry = {
+        "at": datetime.now(timezone.utc).isoformat(),
+        "ms": round(seconds * 1000, 2),
+        "sql": scrub(sql),
+        "params": redact(params),
+        "rows": cursor.rowcount,
+        "endpoint": None,
+        "method": None,
+        "path": None,
+        "plan": None,
+    }
+    if has_request_context():
+        # Path only: query strings can carry search terms
+        entry.update(endpoint=request.endpoint, method=request.method, path=request.path)
+
+    if (Config.QUERY_EXPLAIN_RATE > 0 and is_select(sql)
+            and random.random() < Config.QUERY_EXPLAIN_RATE):
+        entry["plan"] = explain(cursor, sql, params)
+
+    with _lock:
+        _entries.append(entry)
+    if has_app_context():
+        current_app.logger.warning(
+            "slow query %.1f ms (%s): %s", entry["ms"], entry["endpoint"] or "-", entry["sql"]
+        )
+
+
+def start_trace():
+    # [queries, db seconds]
+    g._trace_stats = [0, 0.0]
+
+
+def add_server_timing(response):
+    stats = g.pop("_trace_stats", None)
+    if stats is not None:
+        response.headers.add(
+            "Server-Timing", f'db;dur={stats[1] * 1000:.1f};desc="{stats[0]} queries"'
+        )
+    return response
+
+
+# -----------------------------
+# Admin endpoint
+# -----------------------------
+
+
+def grouped(entries):
+    """Buffer entries summed per statement, slowest total first."""
+    groups = {}
+    for e in entries:
+        s = groups.setdefault(e["sql"], {
+            "sql": e["sql"], "count": 0, "totalMs": 0.0, "maxMs": 0.0,
+            "endpoints": set(), "plan": None,
+        })
+        s["count"] += 1
+        s["totalMs"] += e["ms"]
+        s["maxMs"] = max(s["maxMs"], e["ms"])
+        if e["endpoint"]:
+            s["endpoints"].add(e["endpoint"])
+        # Entries are newest first, keep the latest plan
+        s["plan"] = s["plan"] or e["plan"]
+    result = sorted(groups.values(), key=lambda s: s["totalMs"], reverse=True)
+    for s in result:
+        s["totalMs"] = round(s["totalMs"], 2)
+        s["avgMs"] = round(s["totalMs"] / s["count"], 2)
+        s["endpoints"] = sorted(s["endpoints"])
+    return result
+
+
+@token_required
+def queries_view(current_user):
+    if not is_admin(current_user):
+        return jsonify({"success": False, "message": "Not allowed"}), 403
+
+    if request.method == "DELETE":
+        with _lock:
+            _entries.clear()
+        return jsonify({"success": True})
+
+    limit = min(max(request.args.get("limit", 100, type=int), 1), _entries.maxlen)
+    with _lock:
+        entries = list(_entries)
+    entries.reverse()
+
+    if request.args.get("group", "").lower() in ("1", "true"):
+        return jsonify({"slowMs": Config.QUERY_SLOW_MS, "statements": grouped(entries)[:limit]})
+    return jsonify({"slowMs": Config.QUERY_SLOW_MS, "queries": entries[:limit]})
+
+
+def init_app(app):
+    if not Config.QUERY_TRACE_ENABLED:
+        return
+    db.observe_queries(trace_query)
+    app.before_request(start_trace)
+    app.after_request(add_server_timing)
+    app.add_url_rule(
+        "/api/admin/queries", "admin_queries", queries_view, methods=["GET", "DELETE"]
+    )
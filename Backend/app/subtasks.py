@@ -0,0 +1,153 @@
+"""
+Shared write path for ordered subtask rows: "SubTask" (per template) and
+"TaskSubTask" (per task).
+
+Updates are diffed against what is stored so only changed rows are
+touched and subtask ids stay stable across edits.
+"""
+from collections import defaultdict, deque
+from psycopg2.extras import execute_values
+from app.db import insert_many
+
+# (table, owner column)
+TEMPLATE_SUBTASKS = ("SubTask", "templateId")
+TASK_SUBTASKS = ("TaskSubTask", "taskId")
+
+FIELDS = ("action", "description", "assignee", "dependsOn")
+# NOT NULL columns -> label used in validation messages
+REQUIRED_FIELDS = (("action", "Action"), ("description", "Description"), ("assignee", "Assignee"))
+# Nullable text columns
+OPTIONAL_FIELDS = tuple(f for f in FIELDS if f not in dict(REQUIRED_FIELDS))
+
+
+def subtask_values(st, position):
+    return tuple(st.get(f) for f in FIELDS) + (position,)
+
+
+def subtask_errors(subtasks):
+    """
+    Messages for subtasks missing a required field ("Subtask 2: Action is
+    required") or with a non-text value in any other column.
+    """
+    errors = []
+    for idx, st in enumerate(subtasks, start=1):
+        if not isinstance(st, dict):
+            errors.append(f"Subtask {idx}: must be an object")
+            continue
+        for key, label in REQUIRED_FIELDS:
+            value = st.get(key)
+            if not isinstance(value, str) or not value.strip():
+                errors.append(f"Subtask {idx}: {label} is required")
+        for key in OPTIONAL_FIELDS:
+            value = st.get(key)
+            if value is not None and not isinstance(value, str):
+                errors.append(f"Subtask {idx}: {key} must be a string")
+    return errors
+
+
+def payload_id(st):
+    sid = st.get("id")
+    if isinstance(sid, bool):
+        return None
+    try:
+        return int(sid)
+    except (TypeError, ValueError):
+        return None
+
+
+def plan_changes(existing, incoming):
+    """
+    existing: stored rows as (id, action, description, assignee, dependsOn, position)
+    incoming: payload subtasks in their new order
+
+    Payload rows are matched to stored rows by "id" first, then by action
+    name (for clients that don't send ids back). Returns
+    (inserts, updates, deletes) where inserts are value tuples, updates
+    are (id, *values) for rows that really changed and deletes are ids.
+    """
+    stored = {row[0]: tuple(row[1:]) for row in existing}
+    by_action = defaultdict(deque)
+    for row in existing:
+        by_action[row[1]].append(row[0])
+
+    claimed = set()
+    matches = [None] * len(incoming)
+
+    for i, st in enumerate(incoming):
+        sid = payload_id(st)
+        if sid in stored and sid not in claimed:
+            matches[i] = sid
+            claimed.add(sid)
+
+    for i, st in enumerate(incoming):
+        if matches[i] is not None:
+            continue
+        candidates = by_action.get(st.get("action"))
+        while candidates:
+            sid = candidates.popleft()
+            if sid not in claimed:
+                matches[i] = sid
+                claimed.add(sid)
+                break
+
+    inserts, updates = [], []
+    for position, (st, sid) in enumerate(zip(incoming, matches)):
+        values = subtask_values(st, position)
+        if sid is None:
+            inserts.append(values)
+        elif values != stored[sid]:
+            updates.append((sid,) + values)
+
+    deletes = [sid for sid in stored if sid not in claimed]
+    return inserts, updates, deletes
+
+
+def insert_subtasks(cur, kind, owner_id, subtasks):
+    insert_owned_subtasks(cur, kind, [(owner_id, subtasks)])
+
+
+def insert_owned_subtasks(cur, kind, owned):
+    """insert_subtasks for several owners at once: owned = [(owner_id, subtasks)]."""
+    table, owner = kind
+    insert_many(cur, f"""
+        INSERT INTO "{table}"
+        ("{owner}", action, description, assignee, "dependsOn", "position")
+        VALUES %s
+    """, [
+        (owner_id,) + subtask_values(st, position)
+        for owner_id, subtasks in owned
+        for position, st in enumerate(subtasks)
+    ])
+
+
+def sync_subtasks(cur, kind, owner_id, subtasks):
+    """Bring the stored subtasks of one template/task in line with `subtasks`."""
+    table, owner = kind
+    cur.execute(f"""
+        SELECT id, action, description, assignee, "dependsOn", "position"
+        FROM "{table}"
+        WHERE "{owner}"=%s
+        ORDER BY "position", id
+    """, (owner_id,))
+    inserts, updates, deletes = plan_changes(cur.fetchall(), subtasks)
+
+    if deletes:
+        cur.execute(f'DELETE FROM "{table}" WHERE id = ANY(%s)', (deletes,))
+
+    if updates:
+        execute_values(cur, f"""
+            UPDATE "{table}" AS t
+            SET action=v.action, description=v.description, assignee=v.assignee,
+                "dependsOn"=v."dependsOn", "position"=v."position"
+            FROM (VALUES %s) AS v(id, action, description, assignee, "dependsOn", "position")
+            WHERE t.id = v.id
+        """, updates, template="(%s::int, %s::text, %s::text, %s::text, %s::text, %s::int)",
+            page_size=1000)
+
+    insert_many(cur, f"""
+        INSERT INTO "{table}"
+        ("{owner}", action, description, assignee, "dependsOn", "position")
+        VALUES %s
+    """, [(owner_id,) + values for values in inserts])
+
+    return {"inserted": len(inserts), "updated": len(updates), "deleted": len(deletes)}
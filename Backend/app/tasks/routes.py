@@ -1,11 +1,30 @@
 from flask import Blueprint, request, jsonify
-from app.db import get_cursor, conn
+from app.db import get_cursor, get_conn
+from app.subtasks import insert_subtasks, sync_subtasks, subtask_errors, TASK_SUBTASKS
 from app.auth.utils import token_required
+from app.workflow.graph import DependencyGraph
+from app.workflow.edges import load_subtasks, load_edges, sync_edges, related_subtasks
+from app.workflow.schedule import compute_schedule, cached_schedule, remember_schedule
+from app.workflow import engine
+from app.conditional import table_version, make_etag, not_modified, with_etag
+from app.fastjson import json_object_sql, json_list, raw_response
 from datetime import datetime
 import psycopg2
 
 tasks_bp = Blueprint("tasks", __name__)
 
+# List rows rendered as JSON text by Postgres (see app/fastjson.py)
+TASK_LIST_JSON = json_object_sql([
+    ("id", "id"),
+    ("name", "name"),
+    ("description", "description"),
+    ("templateId", '"templateId"'),
+    ("templateName", '"templateName"'),
+    ("templateDescription", '"templateDescription"'),
+    ("createdBy", '"createdBy"'),
+    ("createdOn", '"createdOn"'),
+])
+
 # ======================================================
 # REQUIRED VALIDATION (ONLY)
 # ======================================================
@@ -30,13 +49,7 @@ def validate_required_fields(data):
             errors.append("Template description is required")
 
     # Subtasks validation (if present)
-    for idx, st in enumerate(subtasks, start=1):
-        if not (st.get("action") or "").strip():
-            errors.append(f"Subtask {idx}: Action is required")
-        if not (st.get("description") or "").strip():
-            errors.append(f"Subtask {idx}: Description is required")
-        if not (st.get("assignee") or "").strip():
-            errors.append(f"Subtask {idx}: Assignee is required")
+    errors.extend(subtask_errors(subtasks))
 
     return errors
 
@@ -49,31 +62,21 @@ def validate_required_fields(data):
 def get_tasks(current_user):
     cur = get_cursor()
     try:
-        cur.execute("""
-            SELECT id, name, description, "templateId",
-                   "templateName", "templateDescription",
-                   "createdBy", "createdOn"
+        etag = make_etag(*table_version(cur, "Task"))
+        unchanged = not_modified(etag)
+        if unchanged:
+            cur.close()
+            return unchanged
+
+        cur.execute(f"""
+            SELECT {TASK_LIST_JSON}
             FROM "Task"
             WHERE "isDeleted" = false
             ORDER BY "createdOn" DESC
         """)
         rows = cur.fetchall()
-
-        tasks = [
-            {
-                "id": r[0],
-                "name": r[1],
-                "description": r[2],
-                "templateId": r[3],
-                "templateName": r[4],
-                "templateDescription": r[5],
-                "createdBy": r[6],
-                "createdOn": r[7].isoformat() if r[7] else None
-            }
-            for r in rows
-        ]
         cur.close()
-        return jsonify(tasks), 200
+        return with_etag(raw_response(json_list(r[0] for r in rows)), etag), 200
 
     except Exception as e:
         cur.close()
@@ -90,7 +93,7 @@ def get_task(current_user, id):
     try:
         cur.execute("""
             SELECT id, name, description, "templateId",
-                   "templateName", "templateDescription", "createdBy"
+                   "templateName", "templateDescription", "createdBy", revision
             FROM "Task"
             WHERE id=%s AND "isDeleted"=false
         """, (id,))
@@ -100,6 +103,13 @@ def get_task(current_user, id):
             cur.close()
             return jsonify({"error": "Task not found"}), 404
 
+        # Every write to the task or its subtasks bumps revision
+        etag = make_etag(row[7])
+        unchanged = not_modified(etag)
+        if unchanged:
+            cur.close()
+            return unchanged
+
         task = {
             "id": row[0],
             "name": row[1],
@@ -112,10 +122,11 @@ def get_task(current_user, id):
 
         # Subtasks
         cur.execute("""
-            SELECT id, action, description, assignee, "dependsOn", "originalSubId"
+            SELECT id, action, description, assignee, "dependsOn", "originalSubId",
+                   status
             FROM "TaskSubTask"
             WHERE "taskId"=%s
-            ORDER BY id
+            ORDER BY "position", id
         """, (id,))
         task["taskSubtasks"] = [
             {
@@ -124,18 +135,183 @@ def get_task(current_user, id):
                 "description": r[2],
                 "assignee": r[3],
                 "dependsOn": r[4],
-                "originalSubId": r[5]
+                "originalSubId": r[5],
+                "status": r[6]
             } for r in cur.fetchall()
         ]
 
         cur.close()
-        return jsonify(task), 200
+        return with_etag(jsonify(task), etag), 200
+
+    except Exception:
+        cur.close()
+        return jsonify({"error": "Internal server error"}), 500
+
+
+# ======================================================
+# GET TASK DEPENDENCY GRAPH
+# ======================================================
+@tasks_bp.route("/<int:id>/graph", methods=["GET"])
+@token_required
+def get_task_graph(current_user, id):
+    cur = get_cursor()
+    try:
+        cur.execute('SELECT 1 FROM "Task" WHERE id=%s AND "isDeleted"=false', (id,))
+        if not cur.fetchone():
+            cur.close()
+            return jsonify({"error": "Task not found"}), 404
+
+        # Built from the raw dependsOn strings so dangling references show up
+        graph = DependencyGraph(load_subtasks(cur, TASK_SUBTASKS, id))
+
+        cur.close()
+        return jsonify(graph.to_dict()), 200
+
+    except Exception:
+        cur.close()
+        return jsonify({"error": "Internal server error"}), 500
+
+
+# ======================================================
+# GET TASK SCHEDULE (CRITICAL PATH)
+# ======================================================
+@tasks_bp.route("/<int:id>/schedule", methods=["GET"])
+@token_required
+def get_task_schedule(current_user, id):
+    """
+    Critical path, earliest/latest start, slack and parallel waves over the
+    subtask DAG. Cached until the task's revision changes.
+    """
+    cur = get_cursor()
+    try:
+        cur.execute('SELECT revision FROM "Task" WHERE id=%s AND "isDeleted"=false', (id,))
+        row = cur.fetchone()
+        if not row:
+            cur.close()
+            return jsonify({"error": "Task not found"}), 404
+        revision = row[0]
+
+        result = cached_schedule(id, revision)
+        if result is None:
+            graph = DependencyGraph.from_edges(
+                load_subtasks(cur, TASK_SUBTASKS, id),
+                load_edges(cur, TASK_SUBTASKS, id)
+            )
+            schedule = compute_schedule(graph)
+            if schedule is None:
+                cur.close()
+                return jsonify({
+                    "error": "Subtask dependencies contain a cycle",
+                    "cycles": graph.cycles()
+                }), 409
+            result = {"taskId": id, "revision": revision, **schedule}
+            remember_schedule(id, revision, result)
+
+        cur.close()
+        return jsonify(result), 200
 
     except Exception:
         cur.close()
         return jsonify({"error": "Internal server error"}), 500
 
 
+# ======================================================
+# GET DEPENDENTS / BLOCKERS OF A SUBTASK
+# ======================================================
+@tasks_bp.route(
+    "/<int:id>/subtasks/<int:subtask_id>/<any(dependents, blockers):direction>",
+    methods=["GET"]
+)
+@token_required
+def get_subtask_relations(current_user, id, subtask_id, direction):
+    recursive = request.args.get("recursive", "false").lower() == "true"
+    cur = get_cursor()
+    try:
+        cur.execute('''
+            SELECT 1 FROM "TaskSubTask" WHERE id=%s AND "taskId"=%s
+        ''', (subtask_id, id))
+        if not cur.fetchone():
+            cur.close()
+            return jsonify({"error": "Subtask not found"}), 404
+
+        subtasks = related_subtasks(cur, TASK_SUBTASKS, subtask_id, direction, recursive)
+        cur.close()
+        return jsonify({
+            "subtaskId": subtask_id,
+            "recursive": recursive,
+            direction: subtasks
+        }), 200
+
+    except Exception:
+        cur.close()
+        return jsonify({"error": "Internal server error"}), 500
+
+
+# ======================================================
+# EXECUTION: READY STEPS / START / COMPLETE
+# ======================================================
+@tasks_bp.route("/<int:id>/ready", methods=["GET"])
+@token_required
+def get_ready_subtasks(current_user, id):
+    """Subtasks whose dependencies are all done, plus progress counts."""
+    cur = get_cursor()
+    try:
+        cur.execute('SELECT 1 FROM "Task" WHERE id=%s AND "isDeleted"=false', (id,))
+        if not cur.fetchone():
+            cur.close()
+            return jsonify({"error": "Task not found"}), 404
+
+        ready = engine.ready_subtasks(cur, id)
+        counts = engine.status_counts(cur, id)
+        cur.close()
+        return jsonify({"taskId": id, "ready": ready, "counts": counts}), 200
+
+    except Exception:
+        cur.close()
+        return jsonify({"error": "Internal server error"}), 500
+
+
+@tasks_bp.route(
+    "/<int:id>/subtasks/<int:subtask_id>/<any(start, complete):transition>",
+    methods=["POST"]
+)
+@token_required
+def transition_subtask(current_user, id, subtask_id, transition):
+    """
+    start:    ready -> in_progress
+    complete: ready / in_progress -> done; returns the successors it made ready
+    """
+    cur = get_cursor()
+    try:
+        cur.execute('SELECT 1 FROM "Task" WHERE id=%s AND "isDeleted"=false', (id,))
+        if not cur.fetchone():
+            cur.close()
+            return jsonify({"error": "Task not found"}), 404
+
+        if transition == "start":
+            subtask, released = engine.start(cur, id, subtask_id), []
+        else:
+            subtask, released = engine.complete(cur, id, subtask_id)
+        if subtask is None:
+            get_conn().rollback()
+            cur.close()
+            return jsonify({"error": "Subtask not found"}), 404
+
+        cur.execute('UPDATE "Task" SET revision = revision + 1 WHERE id=%s', (id,))
+        get_conn().commit()
+        cur.close()
+        return jsonify({"subtask": subtask, "released": released}), 200
+
+    except engine.TransitionError as e:
+        get_conn().rollback()
+        cur.close()
+        return jsonify({"error": f"Cannot {transition}: {e}", "status": e.status}), 409
+    except Exception:
+        get_conn().rollback()
+        cur.close()
+        return jsonify({"error": "Internal server error"}), 500
+
+
 # ======================================================
 # CREATE TASK
 # ======================================================
@@ -179,25 +355,15 @@ def create_task(current_user):
         task_id = cur.fetchone()[0]
 
         # Insert Subtasks
-        for st in subtasks:
-            cur.execute("""
-                INSERT INTO "TaskSubTask"
-                ("taskId", action, description, assignee, "dependsOn")
-                VALUES (%s,%s,%s,%s,%s)
-            """, (
-                task_id,
-                st.get("action"),
-                st.get("description"),
-                st.get("assignee"),
-                st.get("dependsOn")
-            ))
-
-        conn.commit()
+        insert_subtasks(cur, TASK_SUBTASKS, task_id, subtasks)
+        engine.refresh_state(cur, task_id, sync_edges(cur, TASK_SUBTASKS, task_id))
+
+        get_conn().commit()
         cur.close()
         return jsonify({"message": "Task created", "id": task_id}), 201
 
     except Exception:
-        conn.rollback()
+        get_conn().rollback()
         cur.close()
         return jsonify({"error": "Internal server error"}), 500
 
@@ -236,37 +402,28 @@ def update_task(current_user, id):
         if template_id:
             cur.execute("""
                 UPDATE "Task"
-                SET name=%s, "templateId"=%s, "templateDescription"=%s
+                SET name=%s, "templateId"=%s, "templateDescription"=%s,
+                    revision=revision + 1
                 WHERE id=%s
             """, (name, template_id, description, id))
         else:
             cur.execute("""
                 UPDATE "Task"
-                SET name=%s, description=%s, "templateId"=NULL
+                SET name=%s, description=%s, "templateId"=NULL,
+                    revision=revision + 1
                 WHERE id=%s
             """, (name, description, id))
 
-        # Replace subtasks
-        cur.execute('DELETE FROM "TaskSubTask" WHERE "taskId"=%s', (id,))
-        for st in subtasks:
-            cur.execute("""
-                INSERT INTO "TaskSubTask"
-                ("taskId", action, description, assignee, "dependsOn")
-                VALUES (%s,%s,%s,%s,%s)
-            """, (
-                id,
-                st.get("action"),
-                st.get("description"),
-                st.get("assignee"),
-                st.get("dependsOn")
-            ))
-
-        conn.commit()
+        # Apply only the subtask changes (ids stay stable)
+        sync_subtasks(cur, TASK_SUBTASKS, id, subtasks)
+        engine.refresh_state(cur, id, sync_edges(cur, TASK_SUBTASKS, id))
+
+        get_conn().commit()
         cur.close()
         return jsonify({"message": "Task updated"}), 200
 
     except Exception:
-        conn.rollback()
+        get_conn().rollback()
         cur.close()
         return jsonify({"error": "Internal server error"}), 500
 
@@ -285,11 +442,11 @@ def delete_task(current_user, id):
             return jsonify({"error": "Task not found"}), 404
 
         cur.execute('UPDATE "Task" SET "isDeleted"=true WHERE id=%s', (id,))
-        conn.commit()
+        get_conn().commit()
         cur.close()
         return jsonify({"message": "Task deleted"}), 200
 
     except Exception:
-        conn.rollback()
+        get_conn().rollback()
         cur.close()
         return jsonify({"error": "Internal server error"}), 500
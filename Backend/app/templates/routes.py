@@ -1,16 +1,34 @@
 from flask import Blueprint, request, jsonify
 from datetime import datetime
-from app.db import get_cursor, conn
+from app.db import get_cursor, get_conn
+from app.cache import cached, invalidate
+from app.conditional import tagged, not_modified, with_etag
+from app.subtasks import insert_subtasks, sync_subtasks, subtask_errors, TEMPLATE_SUBTASKS
 from app.auth.utils import token_required
+from app.workflow.graph import DependencyGraph
+from app.workflow.edges import load_subtasks, sync_edges, related_subtasks
 
 templates_bp = Blueprint("templates", __name__)
 
+LIST_KEY = "templates:list"
+
+
+def template_keys(template_id):
+    """Cache keys holding one template's payloads."""
+    return f"templates:{template_id}", f"templates:{template_id}:subtasks"
+
+
 # ===============================
 # GET ALL TEMPLATES
 # ===============================
 @templates_bp.route("/", methods=["GET"])
 @token_required
 def get_templates():
+    entry = cached(LIST_KEY, lambda: tagged(load_templates()))
+    return not_modified(entry["etag"]) or (with_etag(jsonify(entry["data"]), entry["etag"]), 200)
+
+
+def load_templates():
     cur = get_cursor()
     cur.execute("""
         SELECT id, name, description, "createdOn", "createdBy", label
@@ -21,7 +39,7 @@ def get_templates():
     rows = cur.fetchall()
     cur.close()
 
-    return jsonify([
+    return [
         {
             "id": r[0],
             "name": r[1],
@@ -31,7 +49,7 @@ def get_templates():
             "label": r[5],
         }
         for r in rows
-    ]), 200
+    ]
 
 
 # ===============================
@@ -40,24 +58,82 @@ def get_templates():
 @templates_bp.route("/<int:template_id>/subtasks", methods=["GET"])
 @token_required
 def get_subtasks(template_id):
+    entry = cached(template_keys(template_id)[1], lambda: tagged(load_subtask_flow(template_id)))
+    return not_modified(entry["etag"]) or (with_etag(jsonify(entry["data"]), entry["etag"]), 200)
+
+
+def load_subtask_flow(template_id):
     cur = get_cursor()
     cur.execute("""
         SELECT action, "dependsOn", description
         FROM "SubTask"
         WHERE "templateId" = %s
-        ORDER BY id ASC
+        ORDER BY "position" ASC, id ASC
     """, (template_id,))
     rows = cur.fetchall()
     cur.close()
 
-    return jsonify([
+    return [
         {
             "action": r[0],
             "dependsOn": r[1],
             "description": r[2]
         }
         for r in rows
-    ]), 200
+    ]
+
+
+# ===============================
+# GET DEPENDENCY GRAPH
+# ===============================
+@templates_bp.route("/<int:template_id>/graph", methods=["GET"])
+@token_required
+def get_template_graph(template_id):
+    """Parsed dependsOn edges, validation result, topological order and layers."""
+    cur = get_cursor()
+    cur.execute("""
+        SELECT 1 FROM "Template" WHERE id = %s AND "isDeleted" = false
+    """, (template_id,))
+    if not cur.fetchone():
+        cur.close()
+        return jsonify({"error": "Template not found"}), 404
+
+    # Built from the raw dependsOn strings so dangling references show up
+    graph = DependencyGraph(load_subtasks(cur, TEMPLATE_SUBTASKS, template_id))
+    cur.close()
+    return jsonify(graph.to_dict()), 200
+
+
+# ===============================
+# GET DEPENDENTS / BLOCKERS OF A SUBTASK
+# ===============================
+@templates_bp.route(
+    "/<int:template_id>/subtasks/<int:subtask_id>/<any(dependents, blockers):direction>",
+    methods=["GET"]
+)
+@token_required
+def get_subtask_relations(template_id, subtask_id, direction):
+    """
+    dependents: steps that depend on this one; blockers: steps it depends on.
+    Query Params:
+        recursive: "true" for the full transitive closure
+    """
+    recursive = request.args.get("recursive", "false").lower() == "true"
+    cur = get_cursor()
+    cur.execute("""
+        SELECT 1 FROM "SubTask" WHERE id = %s AND "templateId" = %s
+    """, (subtask_id, template_id))
+    if not cur.fetchone():
+        cur.close()
+        return jsonify({"error": "Subtask not found"}), 404
+
+    subtasks = related_subtasks(cur, TEMPLATE_SUBTASKS, subtask_id, direction, recursive)
+    cur.close()
+    return jsonify({
+        "subtaskId": subtask_id,
+        "recursive": recursive,
+        direction: subtasks
+    }), 200
 
 
 # ===============================
@@ -66,6 +142,14 @@ def get_subtasks(template_id):
 @templates_bp.route("/<int:id>", methods=["GET"])
 @token_required
 def get_template_by_id(id):
+    entry = cached(template_keys(id)[0], lambda: tagged(load_template(id)))
+    if entry is None:
+        return jsonify({"error": "Template not found"}), 404
+    return not_modified(entry["etag"]) or (with_etag(jsonify(entry["data"]), entry["etag"]), 200)
+
+
+def load_template(id):
+    """Template with its subtasks, or None when missing/deleted."""
     cur = get_cursor()
     cur.execute("""
         SELECT id, name, description, "createdOn", "createdBy", label
@@ -76,7 +160,7 @@ def get_template_by_id(id):
 
     if not row:
         cur.close()
-        return jsonify({"error": "Template not found"}), 404
+        return None
 
     template = {
         "id": row[0],
@@ -91,7 +175,7 @@ def get_template_by_id(id):
         SELECT id, action, "dependsOn", description, assignee
         FROM "SubTask"
         WHERE "templateId" = %s
-        ORDER BY id ASC
+        ORDER BY "position" ASC, id ASC
     """, (id,))
     subtask_rows = cur.fetchall()
     cur.close()
@@ -106,8 +190,7 @@ def get_template_by_id(id):
         }
         for r in subtask_rows
     ]
-
-    return jsonify(template), 200
+    return template
 
 
 # ===============================
@@ -117,6 +200,9 @@ def get_template_by_id(id):
 @token_required
 def add_template():
     data = request.json
+    errors = subtask_errors(data.get("subtasks", []))
+    if errors:
+        return jsonify({"error": "Validation failed", "messages": errors}), 400
     cur = get_cursor()
 
     cur.execute("""
@@ -134,21 +220,13 @@ def add_template():
 
     template_id = cur.fetchone()[0]
 
-    for s in data.get("subtasks", []):
-        cur.execute("""
-            INSERT INTO "SubTask"
-            (action, "dependsOn", description, assignee, "templateId")
-            VALUES (%s, %s, %s, %s, %s)
-        """, (
-            s.get("action"),
-            s.get("dependsOn"),
-            s.get("description"),
-            s.get("assignee"),
-            template_id
-        ))
-
-    conn.commit()
+    insert_subtasks(cur, TEMPLATE_SUBTASKS, template_id, data.get("subtasks", []))
+    sync_edges(cur, TEMPLATE_SUBTASKS, template_id)
+
+    get_conn().commit()
     cur.close()
+    # Also drops anything cached for this id while it did not exist yet
+    invalidate(LIST_KEY, *template_keys(template_id))
     return jsonify({"id": template_id}), 201
 
 
@@ -159,6 +237,9 @@ def add_template():
 @token_required
 def update_template(id):
     data = request.json
+    errors = subtask_errors(data.get("subtasks", []))
+    if errors:
+        return jsonify({"error": "Validation failed", "messages": errors}), 400
     cur = get_cursor()
 
     cur.execute("""
@@ -173,23 +254,13 @@ def update_template(id):
         id
     ))
 
-    cur.execute("""DELETE FROM "SubTask" WHERE "templateId"=%s""", (id,))
-
-    for s in data.get("subtasks", []):
-        cur.execute("""
-            INSERT INTO "SubTask"
-            (action, "dependsOn", description, assignee, "templateId")
-            VALUES (%s, %s, %s, %s, %s)
-        """, (
-            s.get("action"),
-            s.get("dependsOn"),
-            s.get("description"),
-            s.get("assignee"),
-            id
-        ))
-
-    conn.commit()
+    # Apply only the subtask changes (ids stay stable)
+    sync_subtasks(cur, TEMPLATE_SUBTASKS, id, data.get("subtasks", []))
+    sync_edges(cur, TEMPLATE_SUBTASKS, id)
+
+    get_conn().commit()
     cur.close()
+    invalidate(LIST_KEY, *template_keys(id))
     return jsonify({"message": "Updated"}), 200
 
 
@@ -201,6 +272,7 @@ def update_template(id):
 def delete_template(id):
     cur = get_cursor()
     cur.execute("""UPDATE "Template" SET "isDeleted"=true WHERE id=%s""", (id,))
-    conn.commit()
+    get_conn().commit()
     cur.close()
+    invalidate(LIST_KEY, *template_keys(id))
     return jsonify({"message": "Deleted"}), 200
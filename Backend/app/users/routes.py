@@ -1,74 +1,130 @@
-from flask import Blueprint, request, jsonify, abort
-from app.db import get_cursor, conn
+from flask import Blueprint, request, jsonify, abort, current_app
+from app.db import get_cursor, get_conn
 from app.auth.utils import token_required
+from app.conditional import make_etag, not_modified, with_etag
+from app.fastjson import json_object_sql, json_list, raw_response
 
 users_bp = Blueprint("users", __name__)
 
+# Each user rendered as JSON text by Postgres (see app/fastjson.py)
+USER_JSON = json_object_sql([
+    ("id", "id"),
+    ("firstName", '"firstName"'),
+    ("lastName", '"lastName"'),
+    ("displayName", '"displayName"'),
+    ("email", '"email"'),
+    ("dept", '"dept"'),
+    ("createdAt", '"createdAt"'),
+    ("updateSource", '"updateSource"'),
+    ("isDeleted", '"isDeleted"'),
+])
+
+
+def count_users(cur, show_deleted, mode):
+    """
+    Total for the pagination block.
+    mode: "exact" (COUNT(*)), "estimate" (planner statistics, O(1)) or "none".
+    """
+    if mode == "none":
+        return None
+
+    if mode == "estimate":
+        # reltuples counts soft-deleted rows too; good enough for a page count.
+        # It is -1 (or 0) until the table has been analyzed, so fall back then.
+        cur.execute(
+            """SELECT reltuples::bigint FROM pg_class WHERE oid = '"User"'::regclass"""
+        )
+        estimate = cur.fetchone()[0]
+        if estimate > 0:
+            return estimate
+
+    if show_deleted:
+        cur.execute(
+            'SELECT COUNT(*) FROM "User"'
+        )
+    else:
+        cur.execute(
+            'SELECT COUNT(*) FROM "User" WHERE "isDeleted"=FALSE'
+        )
+    return cur.fetchone()[0]
+
+
 @users_bp.route("/all", methods=["GET"])
 @token_required
 def get_users_all():
+    """
+    Query Params:
+        showDeleted: "true" to include soft-deleted users
+        limit: page size (default 5)
+        page: 1-based page number (OFFSET paging)
+        after: user id to continue after (keyset paging, constant cost per page)
+        count: exact | estimate | none
+               (default exact for page mode, none when paging with `after`)
+    """
      
     #abort(500)
     
     show_deleted = request.args.get("showDeleted", "false").lower() == "true"
+    after = request.args.get("after", type=int)
     page = int(request.args.get("page", 1))
     limit = int(request.args.get("limit", 5))
     offset = (page - 1) * limit
+    count_mode = request.args.get("count", "none" if after is not None else "exact").lower()
+    if count_mode not in ("exact", "estimate", "none"):
+        return jsonify({"success": False, "message": "count must be exact, estimate or none"}), 400
 
     cur = get_cursor()
     try:
-        if show_deleted:
-            cur.execute(
-                'SELECT COUNT(*) FROM "User"'
-            )
-        else:
-            cur.execute(
-                'SELECT COUNT(*) FROM "User" WHERE "isDeleted"=FALSE'
-            )
-        total_users = cur.fetchone()[0]
-        total_pages = (total_users + limit - 1) // limit
-
-        if show_deleted:
-            cur.execute(
-                'SELECT id, "firstName", "lastName", "displayName", "email", "dept", "createdAt", "updateSource", "isDeleted" '
-                'FROM "User" ORDER BY id ASC LIMIT %s OFFSET %s',
-                (limit, offset)
-            )
-        else:
-            cur.execute(
-                'SELECT id, "firstName", "lastName", "displayName", "email", "dept", "createdAt", "updateSource", "isDeleted" '
-                'FROM "User" WHERE "isDeleted"=FALSE ORDER BY id ASC LIMIT %s OFFSET %s',
-                (limit, offset)
-            )
+        total_users = count_users(cur, show_deleted, count_mode)
+        total_pages = (total_users + limit - 1) // limit if total_users is not None else None
+
+        where = [] if show_deleted else ['"isDeleted"=FALSE']
+        params = []
+        if after is not None:
+            # Walks the primary key index: page 10,000 costs the same as page 1
+            where.append("id > %s")
+            params.append(after)
+        # xmin (row version) feeds the page's ETag
+        sql = f'SELECT id, xmin::text, {USER_JSON} FROM "User"'
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY id ASC LIMIT %s"
+        # One extra row tells us whether another page exists
+        params.append(limit + 1)
+        if after is None:
+            sql += " OFFSET %s"
+            params.append(offset)
+        cur.execute(sql, tuple(params))
 
         users = cur.fetchall()
-        user_list = [
-            {
-                "id": u[0],
-                "firstName": u[1],
-                "lastName": u[2],
-                "displayName": u[3],
-                "email": u[4],
-                "dept": u[5],
-                "createdAt": u[6].isoformat(),
-                "updateSource": u[7],
-                "isDeleted": u[8],
-            }
-            for u in users
-        ]
+        has_more = len(users) > limit
+        users = users[:limit]
 
-        return jsonify({
-            "users": user_list,
-            "pagination": {
-                "page": page,
-                "limit": limit,
-                "total": total_users,
-                "totalPages": total_pages
-            }
-        })
+        etag = make_etag(total_users, has_more, [(u[0], u[1]) for u in users])
+        unchanged = not_modified(etag)
+        if unchanged:
+            return unchanged
+
+        pagination = {
+            "limit": limit,
+            "total": total_users,
+            "totalPages": total_pages,
+            "nextCursor": users[-1][0] if has_more else None
+        }
+        if after is None:
+            pagination["page"] = page
+        else:
+            pagination["after"] = after
+
+        # Rows arrive as JSON text; no per-row dicts for limit=5000 pages
+        body = '{"users":%s,"pagination":%s}' % (
+            json_list(u[2] for u in users),
+            current_app.json.dumps(pagination)
+        )
+        return with_etag(raw_response(body), etag)
 
     except Exception as e:
-        conn.rollback()
+        get_conn().rollback()
         return jsonify({"success": False, "message": str(e)}), 500
 
 
@@ -90,7 +146,7 @@ def update_user(user_id):
         sql = f'UPDATE "User" SET {", ".join(fields)} WHERE id=%s RETURNING id, "firstName", "lastName", "displayName", "email", "dept", "createdAt", "updateSource"'
         cur.execute(sql, tuple(values))
         updated = cur.fetchone()
-        conn.commit()
+        get_conn().commit()
 
         if updated:
             user = {
@@ -106,7 +162,7 @@ def update_user(user_id):
             return jsonify(user)
         return jsonify({"success": False, "message": "User not found"}), 404
     except Exception as e:
-        conn.rollback()
+        get_conn().rollback()
         return jsonify({"success": False, "message": str(e)}), 500
 
 
@@ -120,12 +176,12 @@ def soft_delete_user(user_id):
         )
         result = cur.fetchone()
         if result:
-            conn.commit()
+            get_conn().commit()
             return jsonify({"success": True, "message": "User deleted successfully"})
         else:
             return jsonify({"success": False, "message": "User not found"}), 404
     except Exception as e:
-        conn.rollback()
+        get_conn().rollback()
         return jsonify({"success": False, "message": str(e)}), 500
 
 
@@ -135,13 +191,20 @@ def soft_delete_user(user_id):
 @token_required
 def search_users():
     """
-    Search users by firstName, lastName, displayName, or email (non-deleted users only)
+    Typeahead search by firstName, lastName or email (non-deleted users only).
+    Matches come from the pg_trgm GIN indexes and are ranked exact match
+    first, then prefix matches, then by trigram similarity.
     Query Params:
         q: string
+        limit: max results (default 10, max 50)
     """
     query = request.args.get("q", "").strip()
     if not query:
         return jsonify({"users": []})
+    limit = min(max(request.args.get("limit", 10, type=int), 1), 50)
+
+    # Treat % and _ typed by the user literally
+    escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
 
     cur = get_cursor()
     try:
@@ -151,15 +214,34 @@ def search_users():
             FROM "User"
             WHERE "isDeleted"=FALSE
             AND (
-                "firstName" ILIKE %s OR
-                "lastName" ILIKE %s OR
-                
-                "email" ILIKE %s
+                "firstName" ILIKE %(contains)s OR
+                "lastName" ILIKE %(contains)s OR
+                "email" ILIKE %(contains)s
             )
-            ORDER BY id ASC
-            LIMIT 10
+            ORDER BY
+                CASE
+                    WHEN lower("firstName") = lower(%(q)s)
+                      OR lower("lastName") = lower(%(q)s)
+                      OR lower("email") = lower(%(q)s) THEN 0
+                    WHEN "firstName" ILIKE %(prefix)s
+                      OR "lastName" ILIKE %(prefix)s
+                      OR "email" ILIKE %(prefix)s THEN 1
+                    ELSE 2
+                END,
+                greatest(
+                    similarity("firstName", %(q)s),
+                    similarity("lastName", %(q)s),
+                    similarity("email", %(q)s)
+                ) DESC,
+                id ASC
+            LIMIT %(limit)s
             ''',
-            (f"%{query}%", f"%{query}%",   f"%{query}%")
+            {
+                "q": query,
+                "contains": f"%{escaped}%",
+                "prefix": f"{escaped}%",
+                "limit": limit,
+            }
         )
         users = cur.fetchall()
         user_list = [
@@ -177,5 +259,5 @@ def search_users():
         ]
         return jsonify({"users": user_list})
     except Exception as e:
-        conn.rollback()
+        get_conn().rollback()
         return jsonify({"success": False, "message": str(e)}) 
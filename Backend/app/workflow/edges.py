@@ -0,0 +1,115 @@
+"""
+Data access for the resolved dependency edges ("SubTaskDependency" /
+"TaskSubTaskDependency").
+
+The comma-separated `dependsOn` strings stay the source of truth the UI
+edits; every write re-resolves them into indexed edge rows so "what
+depends on X" and "what blocks Y" are index lookups (recursively via a
+CTE) instead of loading and string-splitting every subtask.
+"""
+from app.db import insert_many
+from app.subtasks import TEMPLATE_SUBTASKS, TASK_SUBTASKS
+from app.workflow.graph import DependencyGraph
+
+# subtask kind -> (edge table, owner column)
+EDGE_TABLES = {
+    TEMPLATE_SUBTASKS: ("SubTaskDependency", "templateId"),
+    TASK_SUBTASKS: ("TaskSubTaskDependency", "taskId"),
+}
+
+
+def load_subtasks(cur, kind, owner_id):
+    table, owner = kind
+    cur.execute(f"""
+        SELECT id, action, "dependsOn", assignee
+        FROM "{table}"
+        WHERE "{owner}"=%s
+        ORDER BY "position", id
+    """, (owner_id,))
+    return [
+        {"id": r[0], "action": r[1], "dependsOn": r[2], "assignee": r[3]}
+        for r in cur.fetchall()
+    ]
+
+
+def sync_edges(cur, kind, owner_id):
+    """
+    Re-resolve the owner's dependsOn strings and apply only the edge
+    differences. Call after the subtasks of a template/task were written.
+    Returns the DependencyGraph that was built.
+    """
+    edge_table, owner = EDGE_TABLES[kind]
+    graph = DependencyGraph(load_subtasks(cur, kind, owner_id))
+    wanted = {(e["target"], e["source"]) for e in graph.edges()}
+
+    cur.execute(f"""
+        SELECT "subTaskId", "dependsOnId" FROM "{edge_table}" WHERE "{owner}"=%s
+    """, (owner_id,))
+    stored = set(cur.fetchall())
+
+    removed = stored - wanted
+    if removed:
+        cur.execute(f"""
+            DELETE FROM "{edge_table}"
+            WHERE ("subTaskId", "dependsOnId") IN (
+                SELECT * FROM unnest(%s::int[], %s::int[])
+            )
+        """, ([e[0] for e in removed], [e[1] for e in removed]))
+
+    insert_many(cur, f"""
+        INSERT INTO "{edge_table}" ("subTaskId", "dependsOnId", "{owner}")
+        VALUES %s
+    """, [(child, parent, owner_id) for child, parent in sorted(wanted - stored)])
+
+    return graph
+
+
+def load_edges(cur, kind, owner_id):
+    """All (subTaskId, dependsOnId) edges of one template/task."""
+    edge_table, owner = EDGE_TABLES[kind]
+    cur.execute(f"""
+        SELECT "subTaskId", "dependsOnId" FROM "{edge_table}" WHERE "{owner}"=%s
+    """, (owner_id,))
+    return cur.fetchall()
+
+
+def related_subtasks(cur, kind, subtask_id, direction, recursive=False):
+    """
+    direction="dependents": subtasks that depend on `subtask_id`
+    direction="blockers":   subtasks `subtask_id` depends on
+    With recursive=True the whole downstream/upstream closure is returned.
+    """
+    table, _ = kind
+    edge_table, _ = EDGE_TABLES[kind]
+    if direction == "dependents":
+        match_col, result_col = '"dependsOnId"', '"subTaskId"'
+    else:
+        match_col, result_col = '"subTaskId"', '"dependsOnId"'
+
+    if recursive:
+        # UNION (not UNION ALL) stops at already visited nodes, so cycles terminate
+        related = f"""
+            WITH RECURSIVE related(id) AS (
+                SELECT {result_col} FROM "{edge_table}" WHERE {match_col} = %s
+                UNION
+                SELECT e.{result_col}
+                FROM "{edge_table}" e
+                JOIN related r ON e.{match_col} = r.id
+            )
+            SELECT id FROM related
+        """
+    else:
+        related = f"""
+            SELECT {result_col} AS id FROM "{edge_table}" WHERE {match_col} = %s
+        """
+
+    cur.execute(f"""
+        SELECT s.id, s.action, s.assignee
+        FROM ({related}) rel
+        JOIN "{table}" s ON s.id = rel.id
+        ORDER BY s."position", s.id
+    """, (subtask_id,))
+    return [
+        {"id": r[0], "action": r[1], "assignee": r[2]}
+        for r in cur.fetchall()
+    ]
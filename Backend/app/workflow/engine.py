@@ -0,0 +1,156 @@
+"""
+Execution state of task subtasks.
+
+Each "TaskSubTask" moves pending -> ready -> in_progress -> done. The
+"pendingDeps" column counts dependencies that are not done yet; a step
+becomes ready when it reaches 0.
+
+  refresh_state   after the task's steps/edges were rewritten: indegrees
+                  are recomputed in memory from the DependencyGraph and
+                  only rows whose counter or status changed are written
+  complete        marks one step done and decrements its direct
+                  successors through the edge table, so finishing a step
+                  touches its out-edges only, never the whole workflow
+
+Steps on a cycle never reach 0 and stay pending.
+"""
+from psycopg2.extras import execute_values
+
+PENDING = "pending"
+READY = "ready"
+IN_PROGRESS = "in_progress"
+DONE = "done"
+STATUSES = (PENDING, READY, IN_PROGRESS, DONE)
+
+
+class TransitionError(Exception):
+    """The step is not in a state that allows the requested transition."""
+
+    def __init__(self, status):
+        super().__init__(f"Subtask is {status}")
+        self.status = status
+
+
+def subtask_state(row):
+    return {
+        "id": row[0],
+        "action": row[1],
+        "assignee": row[2],
+        "status": row[3],
+        "pendingDeps": row[4],
+    }
+
+
+def refresh_state(cur, task_id, graph):
+    """
+    Bring "pendingDeps"/status in line with `graph` (as returned by
+    sync_edges). Done and in-progress steps keep their status.
+    """
+    cur.execute("""
+        SELECT id, status, "pendingDeps" FROM "TaskSubTask" WHERE "taskId"=%s
+    """, (task_id,))
+    stored = {r[0]: (r[1], r[2]) for r in cur.fetchall()}
+
+    changes = []
+    for sid, (status, pending) in stored.items():
+        open_deps = sum(
+            1 for parent in graph.parents.get(sid, ())
+            if stored.get(parent, (DONE,))[0] != DONE
+        )
+        new_status = status
+        if status in (PENDING, READY):
+            new_status = READY if open_deps == 0 else PENDING
+        if (new_status, open_deps) != (status, pending):
+            changes.append((sid, new_status, open_deps))
+
+    if changes:
+        execute_values(cur, """
+            UPDATE "TaskSubTask" AS t
+            SET status=v.status, "pendingDeps"=v.pending
+            FROM (VALUES %s) AS v(id, status, pending)
+            WHERE t.id = v.id
+        """, changes, template="(%s::int, %s::text, %s::int)", page_size=1000)
+    return len(changes)
+
+
+def current_status(cur, task_id, subtask_id):
+    cur.execute("""
+        SELECT status FROM "TaskSubTask" WHERE id=%s AND "taskId"=%s
+    """, (subtask_id, task_id))
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def start(cur, task_id, subtask_id):
+    """ready -> in_progress. Returns the step, None if it doesn't exist."""
+    cur.execute("""
+        UPDATE "TaskSubTask"
+        SET status=%s, "startedAt"=NOW()
+        WHERE id=%s AND "taskId"=%s AND status=%s
+        RETURNING id, action, assignee, status, "pendingDeps"
+    """, (IN_PROGRESS, subtask_id, task_id, READY))
+    row = cur.fetchone()
+    if row:
+        return subtask_state(row)
+    status = current_status(cur, task_id, subtask_id)
+    if status is None:
+        return None
+    raise TransitionError(status)
+
+
+def complete(cur, task_id, subtask_id):
+    """
+    ready/in_progress -> done, then release direct successors.
+    Returns (step, successors whose status changed to ready), or
+    (None, []) if the step doesn't exist.
+    """
+    cur.execute("""
+        UPDATE "TaskSubTask"
+        SET status=%s, "completedAt"=NOW(), "startedAt"=COALESCE("startedAt", NOW())
+        WHERE id=%s AND "taskId"=%s AND status IN (%s, %s)
+        RETURNING id, action, assignee, status, "pendingDeps"
+    """, (DONE, subtask_id, task_id, READY, IN_PROGRESS))
+    row = cur.fetchone()
+    if not row:
+        status = current_status(cur, task_id, subtask_id)
+        if status is None:
+            return None, []
+        raise TransitionError(status)
+
+    # Row locks serialise concurrent completions of two parents of one child
+    cur.execute("""
+        UPDATE "TaskSubTask" s
+        SET "pendingDeps" = GREATEST(s."pendingDeps" - 1, 0),
+            status = CASE
+                WHEN s."pendingDeps" = 1 AND s.status = %s THEN %s
+                ELSE s.status
+            END
+        FROM "TaskSubTaskDependency" e
+        WHERE e."dependsOnId" = %s AND s.id = e."subTaskId"
+        RETURNING s.id, s.action, s.assignee, s.status, s."pendingDeps"
+    """, (PENDING, READY, subtask_id))
+    released = [
+        subtask_state(r) for r in cur.fetchall()
+        if r[3] == READY and r[4] == 0
+    ]
+    return subtask_state(row), released
+
+
+def ready_subtasks(cur, task_id):
+    """Steps that can be worked on now (the ("taskId", status) index)."""
+    cur.execute("""
+        SELECT id, action, assignee, status, "pendingDeps"
+        FROM "TaskSubTask"
+        WHERE "taskId"=%s AND status=%s
+        ORDER BY "position", id
+    """, (task_id, READY))
+    return [subtask_state(r) for r in cur.fetchall()]
+
+
+def status_counts(cur, task_id):
+    cur.execute("""
+        SELECT status, count(*) FROM "TaskSubTask" WHERE "taskId"=%s GROUP BY status
+    """, (task_id,))
+    counts = dict.fromkeys(STATUSES, 0)
+    counts.update(cur.fetchall())
+    return counts
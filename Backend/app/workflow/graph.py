@@ -0,0 +1,173 @@
+"""
+Dependency graph over template/task subtasks.
+
+`dependsOn` is a comma-separated list where each entry names another
+subtask of the same template/task by id or by action, the same rule the
+React Flow view in pages/Chats.jsx uses. Building the graph, validating it
+(dangling references, cycles) and ordering it are all O(V + E).
+"""
+
+
+def parse_depends_on(value):
+    if not value:
+        return []
+    if isinstance(value, (list, tuple)):
+        parts = value
+    else:
+        parts = str(value).split(",")
+    return [str(p).strip() for p in parts if str(p).strip()]
+
+
+class DependencyGraph:
+    def __init__(self, subtasks):
+        """subtasks: dicts with at least id, action and dependsOn, in display order."""
+        self.subtasks = subtasks
+        self.ids = [st["id"] for st in subtasks]
+        self.parents = {sid: [] for sid in self.ids}
+        self.children = {sid: [] for sid in self.ids}
+        self.dangling = []
+
+        by_id = {str(sid): sid for sid in self.ids}
+        by_action = {}
+        for st in subtasks:
+            # First occurrence wins, as in the client
+            by_action.setdefault((st.get("action") or "").strip(), st["id"])
+
+        for st in subtasks:
+            sid = st["id"]
+            seen = set()
+            for ref in parse_depends_on(st.get("dependsOn")):
+                parent = by_id.get(ref)
+                if parent is None:
+                    parent = by_action.get(ref)
+                if parent is None:
+                    self.dangling.append({"subtaskId": sid, "ref": ref})
+                    continue
+                if parent in seen:
+                    continue
+                seen.add(parent)
+                self.parents[sid].append(parent)
+                self.children[parent].append(sid)
+
+    @classmethod
+    def from_edges(cls, subtasks, edges):
+        """Build from already resolved (subTaskId, dependsOnId) pairs, e.g. the edge tables."""
+        graph = cls([{"id": st["id"], "action": st.get("action"), "assignee": st.get("assignee")}
+                     for st in subtasks])
+        graph.subtasks = subtasks
+        for child, parent in edges:
+            if child in graph.parents and parent in graph.children:
+                graph.parents[child].append(parent)
+                graph.children[parent].append(child)
+        return graph
+
+    def edges(self):
+        return [
+            {"source": parent, "target": sid}
+            for sid in self.ids
+            for parent in self.parents[sid]
+        ]
+
+    def layers(self):
+        """
+        Kahn's algorithm, one frontier at a time. Returns (layers, blocked)
+        where every subtask in layer n only depends on earlier layers and
+        `blocked` holds subtasks that sit on or behind a cycle.
+        """
+        indegree = {sid: len(self.parents[sid]) for sid in self.ids}
+        frontier = [sid for sid in self.ids if indegree[sid] == 0]
+        layers = []
+        while frontier:
+            layers.append(frontier)
+            following = []
+            for sid in frontier:
+                for child in self.children[sid]:
+                    indegree[child] -= 1
+                    if indegree[child] == 0:
+                        following.append(child)
+            frontier = following
+        blocked = [sid for sid in self.ids if indegree[sid] > 0]
+        return layers, blocked
+
+    def cycles(self):
+        """Strongly connected components that form cycles (Tarjan, iterative)."""
+        index = {}
+        low = {}
+        on_stack = set()
+        stack = []
+        result = []
+        counter = 0
+
+        for root in self.ids:
+            if root in index:
+                continue
+            work = [(root, iter(self.children[root]))]
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+
+            while work:
+                node, children = work[-1]
+                advanced = False
+                for child in children:
+                    if child not in index:
+                        index[child] = low[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(self.children[child])))
+                        advanced = True
+                        break
+                    if child in on_stack:
+                        low[node] = min(low[node], index[child])
+                if advanced:
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1 or node in self.children[node]:
+                        result.append(component[::-1])
+        return result
+
+    def to_dict(self):
+        layers, blocked = self.layers()
+        placement = {}
+        for depth, layer in enumerate(layers):
+            for column, sid in enumerate(layer):
+                placement[sid] = (depth, column)
+
+        cycles = self.cycles() if blocked else []
+        nodes = []
+        for st in self.subtasks:
+            sid = st["id"]
+            layer, column = placement.get(sid, (None, None))
+            nodes.append({
+                "id": sid,
+                "action": st.get("action"),
+                "assignee": st.get("assignee"),
+                "dependsOn": self.parents[sid],
+                "layer": layer,
+                "column": column,
+            })
+
+        return {
+            "valid": not blocked and not self.dangling,
+            "nodes": nodes,
+            "edges": self.edges(),
+            "order": [sid for layer in layers for sid in layer],
+            "layers": layers,
+            "blocked": blocked,
+            "cycles": cycles,
+            "dangling": self.dangling,
+        }
@@ -0,0 +1,100 @@
+"""
+Critical-path schedule over a task's subtask DAG.
+
+Every step counts as one unit of work (subtasks carry no duration yet),
+so earliest start equals the step's wave and the project length is the
+number of waves. All passes are O(V + E) over the edge table rows.
+Results are cached per (task id, task revision).
+"""
+import threading
+from collections import OrderedDict
+
+CACHE_SIZE = 256
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def cached_schedule(task_id, revision):
+    with _cache_lock:
+        result = _cache.get((task_id, revision))
+        if result is not None:
+            _cache.move_to_end((task_id, revision))
+        return result
+
+
+def remember_schedule(task_id, revision, result):
+    with _cache_lock:
+        _cache[(task_id, revision)] = result
+        _cache.move_to_end((task_id, revision))
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def compute_schedule(graph, duration=None):
+    """
+    graph: a DependencyGraph. duration: optional {id: units}, default 1.
+    Returns None when the graph has a cycle (no schedule exists).
+    """
+    layers, blocked = graph.layers()
+    if blocked:
+        return None
+
+    order = [sid for layer in layers for sid in layer]
+    length_of = (lambda sid: duration.get(sid, 1)) if duration else (lambda sid: 1)
+
+    # Forward pass in topological order
+    earliest_start = {}
+    earliest_finish = {}
+    for sid in order:
+        start = max((earliest_finish[p] for p in graph.parents[sid]), default=0)
+        earliest_start[sid] = start
+        earliest_finish[sid] = start + length_of(sid)
+    project_length = max(earliest_finish.values(), default=0)
+
+    # Backward pass in reverse topological order
+    latest_start = {}
+    latest_finish = {}
+    for sid in reversed(order):
+        finish = min((latest_start[c] for c in graph.children[sid]), default=project_length)
+        latest_finish[sid] = finish
+        latest_start[sid] = finish - length_of(sid)
+
+    slack = {sid: latest_start[sid] - earliest_start[sid] for sid in order}
+
+    # Walk one zero-slack chain from a zero-slack root to the end
+    critical_path = []
+    current = next(
+        (sid for sid in order if not graph.parents[sid] and slack[sid] == 0), None
+    )
+    while current is not None:
+        critical_path.append(current)
+        current = next(
+            (
+                c for c in graph.children[current]
+                if slack[c] == 0 and earliest_start[c] == earliest_finish[current]
+            ),
+            None
+        )
+
+    steps = []
+    for st in graph.subtasks:
+        sid = st["id"]
+        steps.append({
+            "id": sid,
+            "action": st.get("action"),
+            "assignee": st.get("assignee"),
+            "earliestStart": earliest_start[sid],
+            "earliestFinish": earliest_finish[sid],
+            "latestStart": latest_start[sid],
+            "latestFinish": latest_finish[sid],
+            "slack": slack[sid],
+            "critical": slack[sid] == 0,
+        })
+
+    return {
+        "length": project_length,
+        "criticalPath": critical_path,
+        "waves": layers,
+        "steps": steps,
+    }
@@ -0,0 +1,4 @@
+# ASGI entry point: uvicorn asgi:app --host 0.0.0.0 --port 8000
+from app import create_app
+
+app = create_app(asgi=True)
@@ -0,0 +1,101 @@
+"""
+Per-row INSERT loop vs. insert_many() for the subtask/member write paths.
+
+    python -m bench.bulk_writes [--rows 10,100,500,2000] [--repeat 3]
+
+Run from Backend/ with DATABASE_URL pointing at a scratch database. Rows
+go into a TEMP table shaped like "TaskSubTask", so nothing is persisted.
+Prints one JSON object with the median latency per row count.
+"""
+import argparse
+import json
+import statistics
+import time
+import psycopg2
+from urllib.parse import urlparse
+from app.config import Config
+from app.db import insert_many
+
+CREATE = """
+    CREATE TEMP TABLE bench_subtask (
+        id serial PRIMARY KEY,
+        "taskId" int NOT NULL,
+        action text NOT NULL,
+        description text NOT NULL,
+        assignee text NOT NULL,
+        "dependsOn" text
+    )
+"""
+COLUMNS = '("taskId", action, description, assignee, "dependsOn")'
+
+
+def connect():
+    result = urlparse(Config.DATABASE_URL)
+    return psycopg2.connect(
+        host=result.hostname,
+        database=result.path[1:],
+        user=result.username,
+        password=result.password,
+        port=result.port
+    )
+
+
+def make_rows(n):
+    return [
+        (1, f"Step {i}", f"Description {i}", "Admin", f"Step {i - 1}" if i else None)
+        for i in range(n)
+    ]
+
+
+def per_row(cur, rows):
+    for row in rows:
+        cur.execute(f"INSERT INTO bench_subtask {COLUMNS} VALUES (%s,%s,%s,%s,%s)", row)
+
+
+def batched(cur, rows):
+    insert_many(cur, f"INSERT INTO bench_subtask {COLUMNS} VALUES %s", rows)
+
+
+def timed(conn, fn, rows, repeat):
+    samples = []
+    for _ in range(repeat):
+        cur = conn.cursor()
+        started = time.perf_counter()
+        fn(cur, rows)
+        conn.commit()
+        samples.append(time.perf_counter() - started)
+        cur.execute("TRUNCATE bench_subtask")
+        conn.commit()
+        cur.close()
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", default="10,100,500,2000")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    conn = connect()
+    cur = conn.cursor()
+    cur.execute(CREATE)
+    conn.commit()
+    cur.close()
+
+    results = []
+    for n in [int(x) for x in args.rows.split(",")]:
+        rows = make_rows(n)
+        loop_s = timed(conn, per_row, rows, args.repeat)
+        batch_s = timed(conn, batched, rows, args.repeat)
+        results.append({
+            "rows": n,
+            "perRowMs": round(loop_s * 1000, 2),
+            "batchedMs": round(batch_s * 1000, 2),
+            "speedup": round(loop_s / batch_s, 1) if batch_s else None,
+        })
+    conn.close()
+    print(json.dumps({"benchmark": "bulk_writes", "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,538 @@
+"""
+Concurrent load benchmark for every API blueprint.
+
+    python -m bench.load [--url http://localhost:5000] [--concurrency 8]
+                         [--duration 10 | --requests 500] [--only tasks.,users.all]
+                         [--read-only] [--baseline old.json] [--out new.json]
+
+Run from Backend/ after `python -m bench.seed --reset`, with the same
+DATABASE_URL and SECRET_KEY as the server. Without --url the app is
+driven in-process through Flask's test client (no network, same
+process as the load generator); with --url a running server is hit over
+HTTP, which gives the more realistic numbers.
+
+Each scenario runs on its own, first a few warm-up requests, then
+--concurrency clients for --duration seconds (or --requests requests).
+Per scenario the JSON report has throughput, p50/p95/p99 latency, status
+codes and, from the difference of two /metrics scrapes, DB queries and
+DB time per request (needs METRICS_ENABLED, the default; pass
+--metrics-token if METRICS_TOKEN is set).
+
+Write scenarios only touch seeded rows, but they do change them: reseed
+before runs that should be compared. With --baseline, scenarios whose
+p95 grew by more than --max-regression, or that now run more queries per
+request, are listed under "regressions" and the exit status is 1.
+"""
+import argparse
+import datetime
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+import jwt
+from app.config import Config
+from bench.seed import connect, CREATED_BY, EMAIL_DOMAIN, FIRST_USER_ID, PASSWORD, make_subtasks
+
+WARMUP_REQUESTS = 5
+# Distinct signed-in users the clients rotate through
+TOKEN_USERS = 50
+
+
+# -----------------------------
+# Clients
+# -----------------------------
+# request() sends dict bodies as JSON and str bodies as raw JSON Lines
+
+
+def raw_body(body, headers):
+    return body.encode("utf-8"), {**(headers or {}), "Content-Type": "application/x-ndjson"}
+
+
+class InProcessClient:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None, headers=None):
+        if isinstance(body, str):
+            data, headers = raw_body(body, headers)
+            res = self.client.open(path, method=method, data=data, headers=headers)
+        else:
+            res = self.client.open(path, method=method, json=body, headers=headers)
+        return res.status_code, res.get_data()
+
+
+class HttpClient:
+    def __init__(self, base_url):
+        import requests
+
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+
+    def request(self, method, path, body=None, headers=None):
+        if isinstance(body, str):
+            data, headers = raw_body(body, headers)
+            res = self.session.request(
+                method, self.base_url + path, data=data, headers=headers, timeout=120
+            )
+        else:
+            res = self.session.request(
+                method, self.base_url + path, json=body, headers=headers, timeout=120
+            )
+        return res.status_code, res.content
+
+
+def client_factory(args):
+    if args.url:
+        return lambda: HttpClient(args.url)
+    from app import create_app
+
+    app = create_app()
+    return lambda: InProcessClient(app)
+
+
+# -----------------------------
+# Fixtures
+# -----------------------------
+
+
+def load_fixtures(conn):
+    """Ids of the seeded rows the scenarios pick from."""
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT id, email, "displayName" FROM "User"
+        WHERE id >= %s AND COALESCE("isDeleted", false) = false
+        ORDER BY id
+    """, (FIRST_USER_ID,))
+    users = cur.fetchall()
+
+    cur.execute("""
+        SELECT id FROM "Group" WHERE "createdBy" = %s AND COALESCE(is_deleted, false) = false
+        ORDER BY id
+    """, (CREATED_BY,))
+    groups = [r[0] for r in cur.fetchall()]
+
+    cur.execute("""
+        SELECT s."templateId", s.id FROM "SubTask" s
+        JOIN "Template" t ON t.id = s."templateId"
+        WHERE t."createdBy" = %s AND COALESCE(t."isDeleted", false) = false
+        ORDER BY s."templateId", s."position"
+    """, (CREATED_BY,))
+    template_subtasks = cur.fetchall()
+
+    cur.execute("""
+        SELECT t.id, t.name, COALESCE(t.description, t."templateDescription"), t."templateId",
+               json_agg(json_build_object(
+                   'id', s.id, 'action', s.action, 'description', s.description,
+                   'assignee', s.assignee, 'dependsOn', s."dependsOn"
+               ) ORDER BY s."position", s.id)
+        FROM "Task" t
+        JOIN "TaskSubTask" s ON s."taskId" = t.id
+        WHERE t."createdBy" LIKE %s AND t."isDeleted" = false
+        GROUP BY t.id
+        ORDER BY t.id
+    """, (f"%@{EMAIL_DOMAIN}",))
+    tasks = cur.fetchall()
+
+    cur.execute("""
+        SELECT s."taskId", s.id FROM "TaskSubTask" s
+        JOIN "Task" t ON t.id = s."taskId"
+        WHERE t."createdBy" LIKE %s AND t."isDeleted" = false AND s.status = 'ready'
+        ORDER BY s.id
+    """, (f"%@{EMAIL_DOMAIN}",))
+    ready = cur.fetchall()
+    cur.close()
+    conn.rollback()
+
+    if not (users and groups and template_subtasks and tasks):
+        raise SystemExit("No seeded data found; run `python -m bench.seed --reset` first")
+
+    return {
+        "users": users,
+        "groups": groups,
+        "templates": sorted({t for t, _ in template_subtasks}),
+        "templateSubtasks": template_subtasks,
+        "tasks": tasks,
+        "taskSubtasks": [(t[0], s["id"]) for t in tasks for s in t[4]],
+        # Consumed by the "complete" scenario, each step completes once
+        "ready": ready,
+        "readyLock": threading.Lock(),
+    }
+
+
+def make_tokens(users, rng):
+    exp = datetime.datetime.utcnow() + datetime.timedelta(hours=6)
+    tokens = []
+    for _, email, _ in rng.sample(users, min(TOKEN_USERS, len(users))):
+        token = jwt.encode({"email": email, "exp": exp}, Config.SECRET_KEY, algorithm="HS256")
+        if isinstance(token, bytes):
+            token = token.decode("utf-8")
+        tokens.append(token)
+    return tokens
+
+
+# -----------------------------
+# Scenarios
+# -----------------------------
+# name -> (method, route, make(rng, fx) -> (path, body) or None when exhausted, writes)
+
+
+def next_ready(rng, fx):
+    with fx["readyLock"]:
+        if not fx["ready"]:
+            return None
+        task_id, subtask_id = fx["ready"].pop()
+    return f"/api/tasks/{task_id}/subtasks/{subtask_id}/complete", None
+
+
+def import_group(rng, fx):
+    line = json.dumps({"name": f"Bench import {rng.getrandbits(48):x}", "createdBy": CREATED_BY})
+    return "/api/import/groups?format=jsonl", line
+
+
+def update_task(rng, fx):
+    task_id, name, description, template_id, subtasks = rng.choice(fx["tasks"])
+    return f"/api/tasks/{task_id}", {
+        "name": f"{name.split(' #')[0]} #{rng.randrange(1000)}",
+        "description": description or "Synthetic task",
+        "templateId": template_id,
+        "subtasks": subtasks,
+    }
+
+
+def create_task(rng, fx):
+    assignees = [u[2] for u in rng.sample(fx["users"], min(5, len(fx["users"])))]
+    return "/api/tasks/", {
+        "name": f"Bench load task {rng.getrandbits(32):x}",
+        "description": "Created by bench.load",
+        "subtasks": make_subtasks(rng, 6, assignees),
+    }
+
+
+SCENARIOS = {
+    "auth.check_session": ("GET", "/api/check-session",
+                           lambda rng, fx: ("/api/check-session", None), False),
+    "auth.login": ("POST", "/api/login", lambda rng, fx: (
+        "/api/login", {"email": rng.choice(fx["users"])[1], "password": PASSWORD}), False),
+
+    "users.all": ("GET", "/api/users/all?page=&limit=20", lambda rng, fx: (
+        f"/api/users/all?page={rng.randint(1, 20)}&limit=20", None), False),
+    "users.all_keyset": ("GET", "/api/users/all?after=&limit=50", lambda rng, fx: (
+        f"/api/users/all?after={rng.choice(fx['users'])[0]}&limit=50", None), False),
+    "users.search": ("GET", "/api/users/search?q=", lambda rng, fx: (
+        f"/api/users/search?q={rng.choice(['bench1', 'Bench2', 'contract', 'user3@', 'inv'])}",
+        None), False),
+
+    "groups.list": ("GET", "/api/groups/", lambda rng, fx: ("/api/groups/", None), False),
+    "groups.members": ("GET", "/api/groups/<id>/members", lambda rng, fx: (
+        f"/api/groups/{rng.choice(fx['groups'])}/members", None), False),
+    "groups.with_members": ("GET", "/api/groups/with-members?ids=", lambda rng, fx: (
+        "/api/groups/with-members?ids="
+        + ",".join(str(g) for g in rng.sample(fx["groups"], min(5, len(fx["groups"])))),
+        None), False),
+    "groups.users": ("GET", "/api/groups/users", lambda rng, fx: ("/api/groups/users", None), False),
+    "groups.update_members": ("PUT", "/api/groups/update_members/<id>", lambda rng, fx: (
+        f"/api/groups/update_members/{rng.choice(fx['groups'])}",
+        {"userIds": [u[0] for u in rng.sample(fx["users"], min(20, len(fx["users"])))]}), True),
+
+    "templates.list": ("GET", "/api/templates/", lambda rng, fx: ("/api/templates/", None), False),
+    "templates.get": ("GET", "/api/templates/<id>", lambda rng, fx: (
+        f"/api/templates/{rng.choice(fx['templates'])}", None), False),
+    "templates.subtasks": ("GET", "/api/templates/<id>/subtasks", lambda rng, fx: (
+        f"/api/templates/{rng.choice(fx['templates'])}/subtasks", None), False),
+    "templates.graph": ("GET", "/api/templates/<id>/graph", lambda rng, fx: (
+        f"/api/templates/{rng.choice(fx['templates'])}/graph", None), False),
+    "templates.dependents": ("GET", "/api/templates/<id>/subtasks/<sid>/dependents?recursive=true",
+                             lambda rng, fx: (
+        "/api/templates/{}/subtasks/{}/dependents?recursive=true".format(
+            *rng.choice(fx["templateSubtasks"])), None), False),
+
+    "tasks.list": ("GET", "/api/tasks/", lambda rng, fx: ("/api/tasks/", None), False),
+    "tasks.get": ("GET", "/api/tasks/<id>", lambda rng, fx: (
+        f"/api/tasks/{rng.choice(fx['tasks'])[0]}", None), False),
+    "tasks.graph": ("GET", "/api/tasks/<id>/graph", lambda rng, fx: (
+        f"/api/tasks/{rng.choice(fx['tasks'])[0]}/graph", None), False),
+    "tasks.schedule": ("GET", "/api/tasks/<id>/schedule", lambda rng, fx: (
+        f"/api/tasks/{rng.choice(fx['tasks'])[0]}/schedule", None), False),
+    "tasks.ready": ("GET", "/api/tasks/<id>/ready", lambda rng, fx: (
+        f"/api/tasks/{rng.choice(fx['tasks'])[0]}/ready", None), False),
+    "tasks.blockers": ("GET", "/api/tasks/<id>/subtasks/<sid>/blockers?recursive=true",
+                       lambda rng, fx: (
+        "/api/tasks/{}/subtasks/{}/blockers?recursive=true".format(
+            *rng.choice(fx["taskSubtasks"])), None), False),
+    "tasks.create": ("POST", "/api/tasks/", create_task, True),
+    "tasks.update": ("PUT", "/api/tasks/<id>", update_task, True),
+    "tasks.complete": ("POST", "/api/tasks/<id>/subtasks/<sid>/complete", next_ready, True),
+
+    "issues.list": ("GET", "/api/issues/", lambda rng, fx: ("/api/issues/", None), False),
+    "issues.assignee": ("GET", "/api/issues/?all=true&assignee=", lambda rng, fx: (
+        f"/api/issues/?all=true&assignee={rng.choice(fx['users'])[2]}", None), False),
+    "issues.assignees": ("GET", "/api/issues/assignees",
+                         lambda rng, fx: ("/api/issues/assignees", None), False),
+    "issues.update": ("PUT", "/api/issues/<sid>", lambda rng, fx: (
+        f"/api/issues/{rng.choice(fx['taskSubtasks'])[1]}",
+        {"description": f"Updated by bench.load {rng.randrange(1000)}"}), True),
+
+    "jobs.list": ("GET", "/api/jobs/", lambda rng, fx: ("/api/jobs/", None), False),
+    "export.users": ("GET", "/api/export/users?format=jsonl",
+                     lambda rng, fx: ("/api/export/users?format=jsonl", None), False),
+    "import.groups": ("POST", "/api/import/groups?format=jsonl", import_group, True),
+    "ollama.metrics": ("GET", "/api/ollama/metrics",
+                       lambda rng, fx: ("/api/ollama/metrics", None), False),
+}
+
+
+# -----------------------------
+# Metrics scrape
+# -----------------------------
+
+_SAMPLE = re.compile(r'^(\w+)\{([^}]*)\} (\S+)$')
+_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+SCRAPED = ("db_queries_total", "db_query_seconds_total", "http_request_duration_seconds_count")
+
+
+def scrape(client, token):
+    """{metric: {labels: value}} for the per-endpoint counters, or None."""
+    headers = {"Authorization": f"Bearer {token}"} if token else None
+    try:
+        status, body = client.request("GET", "/metrics", headers=headers)
+    except Exception:
+        return None
+    if status != 200:
+        return None
+    samples = {name: {} for name in SCRAPED}
+    for line in body.decode("utf-8").splitlines():
+        m = _SAMPLE.match(line)
+        if m and m.group(1) in samples:
+            labels = tuple(_LABEL.findall(m.group(2)))
+            samples[m.group(1)][labels] = float(m.group(3))
+    return samples
+
+
+def scrape_delta(before, after):
+    """Totals added between two scrapes, the /metrics endpoint itself excluded."""
+    if before is None or after is None:
+        return None
+    delta = {}
+    for name in SCRAPED:
+        delta[name] = sum(
+            value - before[name].get(labels, 0.0)
+            for labels, value in after[name].items()
+            if dict(labels).get("endpoint") != "metrics"
+        )
+    return delta
+
+
+# -----------------------------
+# Runner
+# -----------------------------
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(p / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def send(client, method, made, token):
+    path, body = made
+    return client.request(method, path, body, {"Authorization": f"Bearer {token}"})
+
+
+def run_scenario(name, new_client, fx, tokens, args, seed):
+    method, route, make, _ = SCENARIOS[name]
+    rng = random.Random(seed)
+
+    warm = new_client()
+    for _ in range(WARMUP_REQUESTS):
+        made = make(rng, fx)
+        if made is None:
+            break
+        send(warm, method, made, rng.choice(tokens))
+
+    before = scrape(warm, args.metrics_token)
+    latencies, statuses, sizes, errors = [], Counter(), [0], [0]
+    lock = threading.Lock()
+    remaining = [args.requests] if args.requests else None
+    deadline = time.perf_counter() + args.duration
+
+    def worker(worker_seed):
+        client = new_client()
+        wrng = random.Random(worker_seed)
+        local, local_status, local_bytes, local_errors = [], Counter(), 0, 0
+        while True:
+            if remaining is not None:
+                with lock:
+                    if remaining[0] <= 0:
+                        break
+                    remaining[0] -= 1
+            elif time.perf_counter() >= deadline:
+                break
+            made = make(wrng, fx)
+            if made is None:
+                break
+            started = time.perf_counter()
+            try:
+                status, body = send(client, method, made, wrng.choice(tokens))
+                local_bytes += len(body)
+            except Exception:
+                status = "error"
+                local_errors += 1
+            local.append(time.perf_counter() - started)
+            local_status[str(status)] += 1
+        with lock:
+            latencies.extend(local)
+            statuses.update(local_status)
+            sizes[0] += local_bytes
+            errors[0] += local_errors
+
+    threads = [
+        threading.Thread(target=worker, args=(seed * 1000 + i,), daemon=True)
+        for i in range(args.concurrency)
+    ]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    delta = scrape_delta(before, scrape(warm, args.metrics_token))
+    latencies.sort()
+    count = len(latencies)
+    failed = errors[0] + sum(n for s, n in statuses.items() if s.isdigit() and int(s) >= 500)
+
+    def ms(value):
+        return round(value * 1000, 2) if value is not None else None
+
+    result = {
+        "name": name,
+        "method": method,
+        "route": route,
+        "requests": count,
+        "seconds": round(elapsed, 3),
+        "throughput": round(count / elapsed, 1) if elapsed else None,
+        "failed": failed,
+        "statusCodes": dict(sorted(statuses.items())),
+        "latencyMs": {
+            "mean": ms(sum(latencies) / count) if count else None,
+            "p50": ms(percentile(latencies, 50)),
+            "p95": ms(percentile(latencies, 95)),
+            "p99": ms(percentile(latencies, 99)),
+            "max": ms(latencies[-1]) if count else None,
+        },
+        "bytesPerRequest": round(sizes[0] / count) if count else None,
+        "dbQueriesPerRequest": None,
+        "dbMsPerRequest": None,
+    }
+    served = delta["http_request_duration_seconds_count"] if delta else 0
+    if served:
+        result["dbQueriesPerRequest"] = round(delta["db_queries_total"] / served, 2)
+        result["dbMsPerRequest"] = round(delta["db_query_seconds_total"] * 1000 / served, 3)
+    return result
+
+
+def compare(results, baseline, max_regression, min_delta_ms):
+    """Scenarios that got slower or chattier than in `baseline`."""
+    previous = {r["name"]: r for r in baseline.get("scenarios", [])}
+    regressions = []
+    for r in results:
+        old = previous.get(r["name"])
+        if not old:
+            continue
+        old_p95, new_p95 = old["latencyMs"]["p95"], r["latencyMs"]["p95"]
+        if old_p95 and new_p95 and new_p95 > old_p95 * (1 + max_regression) \
+                and new_p95 - old_p95 >= min_delta_ms:
+            regressions.append({
+                "name": r["name"], "metric": "p95Ms", "baseline": old_p95, "current": new_p95
+            })
+        old_q, new_q = old.get("dbQueriesPerRequest"), r.get("dbQueriesPerRequest")
+        if old_q is not None and new_q is not None and new_q > old_q + 0.5:
+            regressions.append({
+                "name": r["name"], "metric": "dbQueriesPerRequest", "baseline": old_q, "current": new_q
+            })
+    return regressions
+
+
+def select_scenarios(args):
+    names = list(SCENARIOS)
+    if args.only:
+        prefixes = [p.strip() for p in args.only.split(",") if p.strip()]
+        names = [n for n in names if any(n.startswith(p) for p in prefixes)]
+    if args.read_only:
+        names = [n for n in names if not SCENARIOS[n][3]]
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="base URL of a running server (default: in-process)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10, help="seconds per scenario")
+    parser.add_argument("--requests", type=int, help="requests per scenario instead of --duration")
+    parser.add_argument("--only", help="comma-separated scenario name prefixes")
+    parser.add_argument("--read-only", action="store_true", help="skip scenarios that write")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--metrics-token", default=Config.METRICS_TOKEN)
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="allowed p95 growth against --baseline (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=2,
+                        help="ignore p95 growth smaller than this")
+    parser.add_argument("--out", help="also write the report to this file")
+    args = parser.parse_args()
+
+    names = select_scenarios(args)
+    if not names:
+        raise SystemExit("No scenario matches --only")
+
+    conn = connect()
+    fx = load_fixtures(conn)
+    conn.close()
+    rng = random.Random(args.seed)
+    tokens = make_tokens(fx["users"], rng)
+    new_client = client_factory(args)
+
+    results = []
+    for i, name in enumerate(names):
+        results.append(run_scenario(name, new_client, fx, tokens, args, args.seed + i))
+        print(f"{name}: {results[-1]['throughput']} req/s, p95 {results[-1]['latencyMs']['p95']} ms",
+              file=sys.stderr)
+
+    report = {
+        "benchmark": "load",
+        "target": args.url or "in-process",
+        "concurrency": args.concurrency,
+        "duration": None if args.requests else args.duration,
+        "requestsPerScenario": args.requests,
+        "seed": args.seed,
+        "dataset": {
+            "users": len(fx["users"]),
+            "groups": len(fx["groups"]),
+            "templates": len(fx["templates"]),
+            "tasks": len(fx["tasks"]),
+        },
+        "scenarios": results,
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["regressions"] = compare(
+                results, json.load(f), args.max_regression, args.min_delta_ms
+            )
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    if report.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
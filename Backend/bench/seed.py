@@ -0,0 +1,210 @@
+"""
+Synthetic dataset for the load benchmark (bench/load.py).
+
+    python -m bench.seed [--users 1000] [--groups 50] [--members 20]
+                         [--templates 50] [--subtasks 8] [--tasks 500]
+                         [--seed 42] [--reset]
+
+Run from Backend/ with DATABASE_URL pointing at a scratch database that
+has the Prisma migrations applied. Every row is tagged so it can be
+found and removed again: users and task creators use @bench.invalid
+emails, groups and templates are created by "bench". --reset deletes a
+previous dataset first. The same --seed always produces the same data.
+Prints one JSON object with the row counts.
+"""
+import argparse
+import json
+import random
+import time
+import psycopg2
+from urllib.parse import urlparse
+from psycopg2.extras import execute_values
+from app.config import Config
+from app.db import insert_many
+from app.subtasks import TEMPLATE_SUBTASKS, TASK_SUBTASKS, insert_subtasks
+from app.workflow import engine
+from app.workflow.edges import sync_edges
+
+EMAIL_DOMAIN = "bench.invalid"
+CREATED_BY = "bench"
+# Seeded user ids start here so they never collide with real ones
+FIRST_USER_ID = 900_000_000
+# Login compares the stored password as is
+PASSWORD = "bench-password"
+
+DEPTS = ["Engineering", "Finance", "HR", "Legal", "Operations", "Sales"]
+VERBS = ["Review", "Approve", "Prepare", "Send", "Check", "Sign", "Archive", "Notify"]
+NOUNS = ["contract", "invoice", "laptop", "badge", "account", "budget", "report", "access"]
+
+
+def connect():
+    result = urlparse(Config.DATABASE_URL)
+    return psycopg2.connect(
+        host=result.hostname,
+        database=result.path[1:],
+        user=result.username,
+        password=result.password,
+        port=result.port
+    )
+
+
+def bench_email(i):
+    return f"user{i}@{EMAIL_DOMAIN}"
+
+
+def reset(cur):
+    """Delete everything a previous run seeded (or created while benchmarking)."""
+    like = f"%@{EMAIL_DOMAIN}"
+    cur.execute('DELETE FROM "Job" WHERE "createdBy" LIKE %s', (like,))
+    cur.execute('DELETE FROM "Task" WHERE "createdBy" LIKE %s', (like,))
+    cur.execute("""
+        DELETE FROM "SubTask" WHERE "templateId" IN (
+            SELECT id FROM "Template" WHERE "createdBy" = %s
+        )
+    """, (CREATED_BY,))
+    cur.execute('DELETE FROM "Template" WHERE "createdBy" = %s', (CREATED_BY,))
+    cur.execute("""
+        DELETE FROM "GroupMember"
+        WHERE "groupId" IN (SELECT id FROM "Group" WHERE "createdBy" = %s)
+           OR "userId" >= %s
+    """, (CREATED_BY, FIRST_USER_ID))
+    cur.execute('DELETE FROM "Group" WHERE "createdBy" = %s', (CREATED_BY,))
+    cur.execute('DELETE FROM "User" WHERE id >= %s', (FIRST_USER_ID,))
+
+
+def make_subtasks(rng, n, assignees):
+    """n steps; each depends on up to two earlier ones, so the flow is a DAG."""
+    subtasks = []
+    for i in range(n):
+        parents = rng.sample(range(i), min(i, rng.choice((1, 1, 2)))) if i else []
+        subtasks.append({
+            "action": f"{rng.choice(VERBS)} {rng.choice(NOUNS)} {i + 1}",
+            "description": f"Synthetic step {i + 1}",
+            "assignee": rng.choice(assignees),
+            "dependsOn": ",".join(subtasks[p]["action"] for p in sorted(parents)) or None,
+        })
+    return subtasks
+
+
+def seed(conn, args):
+    rng = random.Random(args.seed)
+    cur = conn.cursor()
+
+    users = []
+    for i in range(args.users):
+        first, last = f"Bench{i}", rng.choice(NOUNS).title()
+        users.append((
+            FIRST_USER_ID + i, first, last, f"{first} {last}", bench_email(i),
+            rng.choice(DEPTS), PASSWORD, "BENCH", False
+        ))
+    insert_many(cur, """
+        INSERT INTO "User" (id, "firstName", "lastName", "displayName", email, dept,
+                            password, "updateSource", "isDeleted")
+        VALUES %s
+    """, users)
+
+    group_ids = [r[0] for r in execute_values(cur, """
+        INSERT INTO "Group" (name, "createdBy", email, is_deleted) VALUES %s RETURNING id
+    """, [
+        (f"Bench group {i}", CREATED_BY, f"group{i}@{EMAIL_DOMAIN}", False)
+        for i in range(args.groups)
+    ], fetch=True)]
+
+    user_ids = [u[0] for u in users]
+    members = [
+        (user_id, group_id)
+        for group_id in group_ids
+        for user_id in rng.sample(user_ids, min(args.members, len(user_ids)))
+    ]
+    insert_many(cur, 'INSERT INTO "GroupMember" ("userId", "groupId") VALUES %s', members)
+
+    # Issues match on display names and group names
+    assignees = [u[3] for u in users] + [f"Bench group {i}" for i in range(args.groups)]
+    if not assignees:
+        assignees = ["Admin"]
+
+    templates = []
+    for i in range(args.templates):
+        cur.execute("""
+            INSERT INTO "Template" (name, description, "createdBy", "createdOn", label, "isDeleted")
+            VALUES (%s, %s, %s, NOW(), %s, false)
+            RETURNING id
+        """, (f"Bench template {i}", f"Synthetic template {i}", CREATED_BY, rng.choice(DEPTS)))
+        template_id = cur.fetchone()[0]
+        subtasks = make_subtasks(rng, args.subtasks, assignees)
+        insert_subtasks(cur, TEMPLATE_SUBTASKS, template_id, subtasks)
+        sync_edges(cur, TEMPLATE_SUBTASKS, template_id)
+        templates.append((template_id, subtasks))
+    conn.commit()
+
+    for i in range(args.tasks):
+        creator = bench_email(rng.randrange(args.users)) if args.users else bench_email(0)
+        if templates and rng.random() < 0.8:
+            template_id, subtasks = rng.choice(templates)
+        else:
+            template_id, subtasks = None, make_subtasks(rng, args.subtasks, assignees)
+        cur.execute("""
+            INSERT INTO "Task" (name, "templateId", description, "createdBy", "createdOn", "isDeleted")
+            VALUES (%s, %s, %s, %s, NOW() - make_interval(mins => %s), false)
+            RETURNING id
+        """, (f"Bench task {i}", template_id, f"Synthetic task {i}", creator, args.tasks - i))
+        task_id = cur.fetchone()[0]
+        insert_subtasks(cur, TASK_SUBTASKS, task_id, subtasks)
+        engine.refresh_state(cur, task_id, sync_edges(cur, TASK_SUBTASKS, task_id))
+        if i % 100 == 99:
+            conn.commit()
+    conn.commit()
+
+    # Fresh statistics so plans don't depend on autovacuum timing
+    conn.autocommit = True
+    for table in ("User", "Group", "GroupMember", "Template", "SubTask", "SubTaskDependency",
+                  "Task", "TaskSubTask", "TaskSubTaskDependency"):
+        cur.execute(f'ANALYZE "{table}"')
+    conn.autocommit = False
+    cur.close()
+
+    return {
+        "users": len(users),
+        "groups": len(group_ids),
+        "groupMembers": len(members),
+        "templates": len(templates),
+        "tasks": args.tasks,
+        "subtasksPerFlow": args.subtasks,
+    }
+
+
+def add_arguments(parser):
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--groups", type=int, default=50)
+    parser.add_argument("--members", type=int, default=20, help="members per group")
+    parser.add_argument("--templates", type=int, default=50)
+    parser.add_argument("--subtasks", type=int, default=8, help="subtasks per template/task")
+    parser.add_argument("--tasks", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument("--reset", action="store_true", help="delete a previous dataset first")
+    args = parser.parse_args()
+
+    conn = connect()
+    cur = conn.cursor()
+    if args.reset:
+        reset(cur)
+        conn.commit()
+    cur.close()
+
+    started = time.perf_counter()
+    counts = seed(conn, args)
+    conn.close()
+    print(json.dumps({
+        "benchmark": "seed",
+        "seconds": round(time.perf_counter() - started, 2),
+        "counts": counts,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+import argparse
+import logging
+from app import create_app
+from app.jobs.worker import run_worker
+
+app = create_app()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run background job workers")
+    parser.add_argument("--concurrency", type=int, help="worker threads (default JOB_WORKER_CONCURRENCY)")
+    parser.add_argument("--kind", action="append", dest="kinds", help="only run these job kinds")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    app.logger.setLevel(logging.INFO)
+    run_worker(app, args.concurrency, args.kinds)
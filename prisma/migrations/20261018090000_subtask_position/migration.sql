@@ -0,0 +1,28 @@
+-- AlterTable
+ALTER TABLE "SubTask" ADD COLUMN     "position" INTEGER NOT NULL DEFAULT 0;
+
+-- AlterTable
+ALTER TABLE "TaskSubTask" ADD COLUMN     "position" INTEGER NOT NULL DEFAULT 0;
+
+-- Backfill: keep the current id-based order
+UPDATE "SubTask" s
+SET "position" = o.pos
+FROM (
+    SELECT id, ROW_NUMBER() OVER (PARTITION BY "templateId" ORDER BY id) - 1 AS pos
+    FROM "SubTask"
+) o
+WHERE o.id = s.id;
+
+UPDATE "TaskSubTask" s
+SET "position" = o.pos
+FROM (
+    SELECT id, ROW_NUMBER() OVER (PARTITION BY "taskId" ORDER BY id) - 1 AS pos
+    FROM "TaskSubTask"
+) o
+WHERE o.id = s.id;
+
+-- CreateIndex
+CREATE INDEX "SubTask_templateId_position_idx" ON "SubTask"("templateId", "position");
+
+-- CreateIndex
+CREATE INDEX "TaskSubTask_taskId_position_idx" ON "TaskSubTask"("taskId", "position");
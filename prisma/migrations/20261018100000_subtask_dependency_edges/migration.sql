@@ -0,0 +1,79 @@
+-- CreateTable
+CREATE TABLE "SubTaskDependency" (
+    "subTaskId" INTEGER NOT NULL,
+    "dependsOnId" INTEGER NOT NULL,
+    "templateId" INTEGER NOT NULL,
+
+    CONSTRAINT "SubTaskDependency_pkey" PRIMARY KEY ("subTaskId","dependsOnId")
+);
+
+-- CreateTable
+CREATE TABLE "TaskSubTaskDependency" (
+    "subTaskId" INTEGER NOT NULL,
+    "dependsOnId" INTEGER NOT NULL,
+    "taskId" INTEGER NOT NULL,
+
+    CONSTRAINT "TaskSubTaskDependency_pkey" PRIMARY KEY ("subTaskId","dependsOnId")
+);
+
+-- CreateIndex
+CREATE INDEX "SubTaskDependency_dependsOnId_idx" ON "SubTaskDependency"("dependsOnId");
+
+-- CreateIndex
+CREATE INDEX "SubTaskDependency_templateId_idx" ON "SubTaskDependency"("templateId");
+
+-- CreateIndex
+CREATE INDEX "TaskSubTaskDependency_dependsOnId_idx" ON "TaskSubTaskDependency"("dependsOnId");
+
+-- CreateIndex
+CREATE INDEX "TaskSubTaskDependency_taskId_idx" ON "TaskSubTaskDependency"("taskId");
+
+-- AddForeignKey
+ALTER TABLE "SubTaskDependency" ADD CONSTRAINT "SubTaskDependency_subTaskId_fkey" FOREIGN KEY ("subTaskId") REFERENCES "SubTask"("id") ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE "SubTaskDependency" ADD CONSTRAINT "SubTaskDependency_dependsOnId_fkey" FOREIGN KEY ("dependsOnId") REFERENCES "SubTask"("id") ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE "TaskSubTaskDependency" ADD CONSTRAINT "TaskSubTaskDependency_subTaskId_fkey" FOREIGN KEY ("subTaskId") REFERENCES "TaskSubTask"("id") ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE "TaskSubTaskDependency" ADD CONSTRAINT "TaskSubTaskDependency_dependsOnId_fkey" FOREIGN KEY ("dependsOnId") REFERENCES "TaskSubTask"("id") ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- Backfill from the comma-separated "dependsOn" strings. Each entry names a
+-- sibling by id or by action (id wins, then the first action in list order),
+-- matching app/workflow/graph.py, which strips both the entries and the
+-- actions. Unresolvable entries are skipped.
+INSERT INTO "SubTaskDependency" ("subTaskId", "dependsOnId", "templateId")
+SELECT DISTINCT s.id, p.id, s."templateId"
+FROM "SubTask" s
+CROSS JOIN LATERAL (
+    SELECT btrim(raw, E' \t\n\r') AS name
+    FROM unnest(string_to_array(s."dependsOn", ',')) AS raw
+) ref
+JOIN LATERAL (
+    SELECT c.id
+    FROM "SubTask" c
+    WHERE c."templateId" = s."templateId"
+      AND (c.id::text = ref.name OR btrim(c.action, E' \t\n\r') = ref.name)
+    ORDER BY (c.id::text = ref.name) DESC, c."position", c.id
+    LIMIT 1
+) p ON true
+WHERE ref.name <> '';
+
+INSERT INTO "TaskSubTaskDependency" ("subTaskId", "dependsOnId", "taskId")
+SELECT DISTINCT s.id, p.id, s."taskId"
+FROM "TaskSubTask" s
+CROSS JOIN LATERAL (
+    SELECT btrim(raw, E' \t\n\r') AS name
+    FROM unnest(string_to_array(s."dependsOn", ',')) AS raw
+) ref
+JOIN LATERAL (
+    SELECT c.id
+    FROM "TaskSubTask" c
+    WHERE c."taskId" = s."taskId"
+      AND (c.id::text = ref.name OR btrim(c.action, E' \t\n\r') = ref.name)
+    ORDER BY (c.id::text = ref.name) DESC, c."position", c.id
+    LIMIT 1
+) p ON true
+WHERE ref.name <> '';
@@ -0,0 +1,2 @@
+-- AlterTable
+ALTER TABLE "Task" ADD COLUMN     "revision" INTEGER NOT NULL DEFAULT 0;
@@ -0,0 +1,2 @@
+-- CreateIndex
+CREATE INDEX "TaskSubTask_assignee_taskId_idx" ON "TaskSubTask"("assignee", "taskId");
@@ -0,0 +1,11 @@
+-- Trigram indexes so the user typeahead's ILIKE '%q%' lookups are index scans
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- CreateIndex
+CREATE INDEX "User_firstName_trgm_idx" ON "User" USING GIN ("firstName" gin_trgm_ops);
+
+-- CreateIndex
+CREATE INDEX "User_lastName_trgm_idx" ON "User" USING GIN ("lastName" gin_trgm_ops);
+
+-- CreateIndex
+CREATE INDEX "User_email_trgm_idx" ON "User" USING GIN ("email" gin_trgm_ops);
@@ -0,0 +1,20 @@
+-- AlterTable
+ALTER TABLE "TaskSubTask" ADD COLUMN "status" TEXT NOT NULL DEFAULT 'pending',
+ADD COLUMN "pendingDeps" INTEGER NOT NULL DEFAULT 0,
+ADD COLUMN "startedAt" TIMESTAMP(3),
+ADD COLUMN "completedAt" TIMESTAMP(3);
+
+-- Every existing step starts out not done: its counter is its number of dependencies
+UPDATE "TaskSubTask" s
+SET "pendingDeps" = d.n
+FROM (
+    SELECT "subTaskId", count(*) AS n
+    FROM "TaskSubTaskDependency"
+    GROUP BY "subTaskId"
+) d
+WHERE d."subTaskId" = s.id;
+
+UPDATE "TaskSubTask" SET "status" = 'ready' WHERE "pendingDeps" = 0;
+
+-- CreateIndex
+CREATE INDEX "TaskSubTask_taskId_status_idx" ON "TaskSubTask"("taskId", "status");
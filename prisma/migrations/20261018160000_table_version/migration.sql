@@ -0,0 +1,40 @@
+-- CreateTable
+CREATE TABLE "TableVersion" (
+    "table" TEXT NOT NULL,
+    "version" BIGINT NOT NULL DEFAULT 0,
+
+    CONSTRAINT "TableVersion_pkey" PRIMARY KEY ("table")
+);
+
+INSERT INTO "TableVersion" ("table", "version") VALUES ('Task', 0), ('Group', 0);
+
+-- Bumped once per writing statement, in the writer's transaction, so a
+-- reader never sees a new version before the data it stands for
+CREATE FUNCTION bump_table_version() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO "TableVersion" ("table", "version") VALUES (TG_TABLE_NAME, 1)
+    ON CONFLICT ("table") DO UPDATE SET "version" = "TableVersion"."version" + 1;
+    RETURN NULL;
+END
+$$;
+
+-- CreateTrigger
+CREATE TRIGGER "Task_version_write"
+AFTER INSERT OR DELETE OR TRUNCATE ON "Task"
+FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+-- Only columns the task list shows: "revision" bumps from subtask edits don't count
+CREATE TRIGGER "Task_version_update"
+AFTER UPDATE OF "name", "description", "templateId", "templateName", "templateDescription",
+    "createdBy", "createdOn", "isDeleted" ON "Task"
+FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+-- CreateTrigger
+CREATE TRIGGER "Group_version_write"
+AFTER INSERT OR DELETE OR TRUNCATE ON "Group"
+FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+CREATE TRIGGER "Group_version_update"
+AFTER UPDATE OF "name", "createdAt", "createdBy", "email", "is_deleted" ON "Group"
+FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
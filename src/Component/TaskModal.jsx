@@ -58,7 +58,7 @@ const TaskModal = ({ open, mode = "create_simple", task = null, onClose, onTaskS
 
   const loadAssignees = async () => {
     try {
-      const usersRes = await axiosInstance.get("/users/all?limit=5000");
+      const usersRes = await axiosInstance.get("/users/all?after=0&limit=5000&count=none");
       const users = usersRes.data.users || [];
 
       const userOptions = users.map((u) => ({
@@ -226,6 +226,7 @@ const TemplateModal = ({ open, onClose, onSuccess, selectedTemplate }) => {
             __id: `subtask-${selectedTemplate.id || "t"}-${idx}-${
               Date.now() + idx
             }`,
+            id: st.id,
             action: st.action || "",
             dependsOn: st.dependsOn || "",
             description: st.description || "",
@@ -1,5 +1,5 @@
 "use client";
-import { useState, useCallback } from "react";
+import { useState, useRef, useEffect } from "react";
 import ChatMessage from "../Component/ChatMessage";
 import axiosInstance from "@/utilsJS/axiosInstance";
 import { Button,Icon } from "semantic-ui-react";
@@ -10,22 +10,11 @@ export default function OllamaChat() {
   const [typingMessage, setTypingMessage] = useState("");
   const [isLoading, setIsLoading] = useState(false);
    const router = useRouter();
-  const typeWriterEffect = useCallback((text, callback) => {
-    let index = 0;
-    setTypingMessage("");
-    const speed = 18;
-
-    const interval = setInterval(() => {
-      setTypingMessage((prev) => prev + text[index]);
-      index++;
-      if (index === text.length) {
-        clearInterval(interval);
-        callback();
-      }
-    }, speed);
+  const abortRef = useRef(null);
 
-    return () => clearInterval(interval);
-  }, []);
+  // Cancel an in-flight generation when leaving the page; the backend
+  // drops the upstream Ollama request as soon as the stream is closed.
+  useEffect(() => () => abortRef.current?.abort(), []);
 
   const sendPrompt = async () => {
     if (!prompt.trim() || isLoading) return;
@@ -36,28 +25,68 @@ export default function OllamaChat() {
     setTypingMessage("");
     setIsLoading(true);
 
+    const controller = new AbortController();
+    abortRef.current = controller;
+    let botReply = "";
 
     try {
-      const res = await axiosInstance.post("/ollama/", {
-        model: "gemma3:1b",
-        prompt: userMsg,
-        stream: false,
+      // axios can't consume a response body incrementally, so use fetch for the SSE stream
+      const res = await fetch(`${axiosInstance.defaults.baseURL}/ollama/`, {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+          Accept: "text/event-stream",
+          Authorization: `Bearer ${localStorage.getItem("token")}`,
+        },
+        body: JSON.stringify({
+          model: "gemma3:1b",
+          prompt: userMsg,
+          stream: true,
+        }),
+        signal: controller.signal,
       });
 
-      const botReply = res.data.response || "No response.";
+      if (res.status === 401) {
+        localStorage.removeItem("token");
+        window.location.href = "/Login";
+        return;
+      }
+      if (!res.ok || !res.body) throw new Error(`HTTP ${res.status}`);
+
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
 
-      typeWriterEffect(botReply, () => {
-        setMessages((prev) => [...prev, { role: "assistant", content: botReply }]);
-        setTypingMessage("");
-        setIsLoading(false);
-      });
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split("\n\n");
+        buffer = events.pop();
+
+        for (const event of events) {
+          if (!event.startsWith("data: ")) continue;
+          const chunk = JSON.parse(event.slice(6));
+          botReply += chunk.response || "";
+          setTypingMessage(botReply);
+        }
+      }
+
+      setMessages((prev) => [
+        ...prev,
+        { role: "assistant", content: botReply || "No response." },
+      ]);
     } catch (err) {
+      if (err.name === "AbortError") return;
       const errorMsg = "something went wrong, please try again.";
 
       setMessages((prev) => [
         ...prev,
-        { role: "assistant", content: errorMsg },
+        { role: "assistant", content: botReply || errorMsg },
       ]);
+    } finally {
+      abortRef.current = null;
       setTypingMessage("");
       setIsLoading(false);
     }
@@ -43,10 +43,15 @@ const Chats = () => {
     }
   };
 
-  const generateGraph = (subtasks) => {
+  // `graph` comes from GET /templates/<id>/graph: edges and layers are
+  // resolved server-side, so nothing here scans the subtask list per edge.
+  const generateGraph = (subtasks, graph) => {
     if (!subtasks || subtasks.length === 0) return;
 
-    const sorted = [...subtasks].sort((a, b) => a.id - b.id);
+    const sorted = subtasks;
+    const placement = {};
+    graph.nodes.forEach((n) => { placement[n.id] = n; });
+    const lastLayer = graph.layers.length;
 
     const newNodes = sorted.map((task, index) => ({
       // Using task.id as the identifier is safer than the action name
@@ -106,32 +111,22 @@ const Chats = () => {
           />
         ) 
       },
-      position: { x: 250, y: index * 120 }, 
+      // Steps stuck on a cycle have no layer; park them below the rest
+      position: {
+        x: 250 + (placement[task.id]?.column ?? 0) * 380,
+        y: (placement[task.id]?.layer ?? lastLayer) * 120,
+      },
       style: { background: 'none', border: 'none', width: 350, padding: 0 }
     }));
 
-    const newEdges = [];
-    sorted.forEach((task) => {
-      if (task.dependsOn) {
-        const parentRefs = String(task.dependsOn).split(",");
-        parentRefs.forEach(ref => {
-          const trimmedRef = ref.trim();
-          // Find parent by ID or Name
-          const parent = sorted.find(t => String(t.id) === trimmedRef || t.action === trimmedRef);
-          
-          if (parent) {
-            newEdges.push({
-              id: `edge-${parent.id}-${task.id}`,
-              source: String(parent.id),
-              target: String(task.id),
-              animated: true,
-              markerEnd: { type: MarkerType.ArrowClosed, color: '#f2711c' },
-              style: { stroke: '#f2711c', strokeWidth: 3, strokeDasharray: '5,5' }
-            });
-          }
-        });
-      }
-    });
+    const newEdges = graph.edges.map(({ source, target }) => ({
+      id: `edge-${source}-${target}`,
+      source: String(source),
+      target: String(target),
+      animated: true,
+      markerEnd: { type: MarkerType.ArrowClosed, color: '#f2711c' },
+      style: { stroke: '#f2711c', strokeWidth: 3, strokeDasharray: '5,5' }
+    }));
 
     setNodes(newNodes);
     setEdges(newEdges);
@@ -140,10 +135,13 @@ const Chats = () => {
   const handleOpenWorkflow = async (template) => {
     setLoading(true);
     try {
-      const res = await axiosInstance.get(`/templates/${template.id}`);
+      const [res, graphRes] = await Promise.all([
+        axiosInstance.get(`/templates/${template.id}`),
+        axiosInstance.get(`/templates/${template.id}/graph`),
+      ]);
       if (res.data) {
         setSelectedTemplate(res.data);
-        generateGraph(res.data.subtasks);
+        generateGraph(res.data.subtasks, graphRes.data);
         setView("workflow");
       }
     } catch (err) { console.error(err); } 
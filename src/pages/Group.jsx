@@ -55,19 +55,12 @@ const Group = () => {
   const fetchGroups = async () => {
     try {
       setLoading(true);
-      const res = await axiosInstance.get(`${API_BASE}/`);
+      const res = await axiosInstance.get(`${API_BASE}/with-members`);
       const groupsData = res.data;
 
-      const membersList = await Promise.all(
-        groupsData.map(async (g) => {
-          const mRes = await axiosInstance.get(`${API_BASE}/${g.id}/members`);
-          return { groupId: g.id, members: mRes.data.map((m) => m.id) };
-        })
-      );
-
       const initialMembers = {};
-      membersList.forEach((m) => {
-        initialMembers[m.groupId] = m.members;
+      groupsData.forEach((g) => {
+        initialMembers[g.id] = g.members;
       });
 
       setMembersEditing(initialMembers);
@@ -12,6 +12,8 @@ import Link from "next/link";
 const Issues = () => {
   const [issues, setIssues] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [selectedTask, setSelectedTask] = useState(null);
   const [taskModalOpen, setTaskModalOpen] = useState(false);
   const [assigneeMap, setAssigneeMap] = useState({});
@@ -30,7 +32,8 @@ const Issues = () => {
     try {
       setLoading(true);
       const res = await axiosInstance.get("/issues/");
-      setIssues(res.data);
+      setIssues(res.data.issues);
+      setNextCursor(res.data.pagination.nextCursor);
     } catch (err) {
       console.error("Error fetching issues", err);
     } finally {
@@ -38,6 +41,20 @@ const Issues = () => {
     }
   }, []);
 
+  // Next page after the last loaded row
+  const loadMore = async () => {
+    try {
+      setLoadingMore(true);
+      const res = await axiosInstance.get("/issues/", { params: { after: nextCursor } });
+      setIssues((prev) => [...prev, ...res.data.issues]);
+      setNextCursor(res.data.pagination.nextCursor);
+    } catch (err) {
+      console.error("Error fetching more issues", err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const fetchAssigneeMap = async () => {
     try {
       const res = await axiosInstance.get("/issues/assignees");
@@ -118,7 +135,7 @@ const Issues = () => {
     }}
     title="Open Task"
   >
-    {item.action}
+    {item.task_name}
   </span>
 
 
@@ -145,6 +162,14 @@ const Issues = () => {
         </Table>
       )}
 
+      {nextCursor && (
+        <div style={{ textAlign: "center", marginBottom: "20px" }}>
+          <Button loading={loadingMore} disabled={loadingMore} onClick={loadMore}>
+            Load more
+          </Button>
+        </div>
+      )}
+
       {/* TASK MODAL HANDLES BOTH VIEWING AND EDITING */}
       {taskModalOpen && (
         <TaskModal